@@ -0,0 +1,122 @@
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logger import Logger
+
+
+def _generate(directory, backend, rows, sensors, days):
+    config = {
+        "log_dir": directory,
+        "filename_pattern": "sensors_%Y%m%d.csv",
+        "buffer_size": 10000,
+        "rotate_every_hours": 24,
+        "max_size_mb": 1024,
+        "retention_days": 36500,
+        "storage_backend": backend,
+    }
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    logger = Logger(config_path)
+
+    rng = random.Random(7)
+    base = datetime(2025, 1, 1)
+    step = timedelta(days=days) / rows
+    per_day = rows // days
+    for day in range(days):
+        readings = [
+            (base + step * i, f"sensor_{i % sensors:03d}", round(rng.gauss(20, 5), 2), "°C")
+            for i in range(day * per_day, (day + 1) * per_day)
+        ]
+        if backend == "columnar":
+            logger._store.append(readings)
+            continue
+        path = os.path.join(directory, (base + timedelta(days=day)).strftime("sensors_%Y%m%d.csv"))
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "sensor_id", "value", "unit"])
+            writer.writerows([ts.isoformat(), sid, value, unit] for ts, sid, value, unit in readings)
+    return logger, base, base + timedelta(days=days)
+
+
+def _naive_aggregate(logger, start, end):
+    groups = {}
+    for row in logger.read_logs(start, end):
+        key = (row["sensor_id"], row["timestamp"].replace(minute=0, second=0, microsecond=0))
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [1, row["value"], row["value"], row["value"]]
+        else:
+            group[0] += 1
+            group[1] += row["value"]
+            group[2] = min(group[2], row["value"])
+            group[3] = max(group[3], row["value"])
+    return groups
+
+
+def run(rows, sensors, days, backend):
+    directory = tempfile.mkdtemp(prefix="bench_aggregate_")
+    try:
+        start = time.perf_counter()
+        logger, begin, finish = _generate(directory, backend, rows, sensors, days)
+        print(f"{rows} wierszy, {sensors} czujników, {days} dni, backend {backend} "
+              f"(wygenerowano w {time.perf_counter() - start:.1f} s)")
+
+        start = time.perf_counter()
+        naive = _naive_aggregate(logger, begin, finish)
+        naive_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = logger.aggregate(begin, finish, "1h", stats=("count", "min", "max", "mean"), use_rollups=False)
+        aggregate_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        logger.aggregate(begin, finish, "1d", stats=("count", "mean", "p50", "p95", "p99"))
+        percentile_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        logger.rebuild_rollups()
+        rebuild_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rollup = logger.aggregate(begin, finish, "1h", stats=("count", "min", "max", "mean"))
+        rollup_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        logger.aggregate(begin, finish, "1d", stats=("count", "min", "max", "mean"))
+        rollup_day_time = time.perf_counter() - start
+
+        assert len(result) == len(naive)
+        assert [(row["bucket"], row["count"]) for row in rollup] == [(row["bucket"], row["count"]) for row in result]
+        print(f"read_logs + dict (1h):            {naive_time:8.2f} s  {rows / naive_time:>12,.0f} wierszy/s")
+        print(f"aggregate count/min/max/mean (1h): {aggregate_time:7.2f} s  {rows / aggregate_time:>12,.0f} wierszy/s")
+        print(f"aggregate z percentylami (1d):     {percentile_time:7.2f} s  {rows / percentile_time:>12,.0f} wierszy/s")
+        print(f"przebudowa agregatów okresowych:   {rebuild_time:7.2f} s")
+        print(f"aggregate z agregatów (1h):        {rollup_time:7.2f} s  {rows / rollup_time:>12,.0f} wierszy/s")
+        print(f"aggregate z agregatów (1d):        {rollup_day_time:7.2f} s  {rows / rollup_day_time:>12,.0f} wierszy/s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregacja historii logów")
+    parser.add_argument("--rows", type=int, default=3000000)
+    parser.add_argument("--sensors", type=int, default=50)
+    parser.add_argument("--days", type=int, default=21)
+    parser.add_argument("--backend", default="csv", choices=["csv", "columnar"])
+    args = parser.parse_args()
+    run(args.rows, args.sensors, args.days, args.backend)
+
+
+if __name__ == "__main__":
+    main()
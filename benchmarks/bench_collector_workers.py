@@ -0,0 +1,121 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server.collector import query_collector
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(query_port, workers, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    for worker in range(workers):
+        while True:
+            try:
+                query_collector("STATS", port=query_port + worker, timeout=1.0)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Kolektor nie wystartował")
+                time.sleep(0.1)
+
+
+def _client(args):
+    port, connections, messages, window = args
+    socks = [socket.create_connection(("127.0.0.1", port)) for _ in range(connections)]
+    sent = 0
+    for s in socks:
+        seq = 0
+        while seq < messages:
+            count = min(window, messages - seq)
+            lines = []
+            for _ in range(count):
+                seq += 1
+                lines.append(json.dumps({
+                    "seq": seq,
+                    "sensor": f"sensor_{s.getsockname()[1]}",
+                    "value": 21.5,
+                    "unit": "°C",
+                    "timestamp": datetime.now().isoformat(),
+                }))
+            s.sendall(("\n".join(lines) + "\n").encode("utf-8"))
+            received = 0
+            while received < count:
+                chunk = s.recv(65536)
+                if not chunk:
+                    raise ConnectionError("Serwer zamknął połączenie")
+                received += chunk.count(b"\n")
+            sent += count
+    for s in socks:
+        s.close()
+    return sent
+
+
+def run(workers, clients, connections, messages, window):
+    directory = tempfile.mkdtemp(prefix="bench_workers_")
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({
+            "log_dir": os.path.join(directory, "logs"),
+            "filename_pattern": "sensors_%Y%m%d.csv",
+            "buffer_size": 1000,
+            "rotate_every_hours": 24,
+            "max_size_mb": 1024,
+            "retention_days": 30,
+            "async_writer": True,
+        }, f)
+
+    port = _free_port()
+    query_port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "server.collector", "--config", config_path, "--port", str(port),
+         "--query-port", str(query_port), "--workers", str(workers)],
+        cwd=ROOT, stdout=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(query_port, workers)
+        with multiprocessing.Pool(clients) as pool:
+            start = time.perf_counter()
+            total = sum(pool.map(_client, [(port, connections, messages, window)] * clients))
+            elapsed = time.perf_counter() - start
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(30)
+        shutil.rmtree(directory, ignore_errors=True)
+    return total, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skalowanie kolektora z procesami roboczymi SO_REUSEPORT")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=8, help="liczba procesów klienckich")
+    parser.add_argument("--connections", type=int, default=4, help="połączenia na proces kliencki")
+    parser.add_argument("--messages", type=int, default=2000, help="wiadomości na połączenie")
+    parser.add_argument("--window", type=int, default=100, help="wiadomości wysyłane przed oczekiwaniem na ACK")
+    args = parser.parse_args()
+
+    print(f"rdzenie CPU: {os.cpu_count()}")
+    for workers in args.workers:
+        total, elapsed = run(workers, args.clients, args.connections, args.messages, args.window)
+        print(f"procesy robocze: {workers:2d}  wiadomości: {total}  czas: {elapsed:6.2f} s  "
+              f"przepustowość: {total / elapsed:10,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
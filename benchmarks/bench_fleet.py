@@ -0,0 +1,215 @@
+import argparse
+import heapq
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from network.client import NetworkClient
+from server.collector import query_collector
+from sensors.humidity_sensor import HumiditySensor
+from sensors.light_sensor import LightSensor
+from sensors.pressure_sensor import PressureSensor
+from sensors.temperature_sensor import TemperatureSensor
+
+SENSOR_TYPES = {
+    "temperature": TemperatureSensor,
+    "humidity": HumiditySensor,
+    "pressure": PressureSensor,
+    "light": LightSensor,
+}
+
+
+def parse_spec(spec: str) -> list:
+    if os.path.isfile(spec):
+        with open(spec, "r") as f:
+            return json.load(f)
+    groups = []
+    for part in spec.split(","):
+        kind, _, rest = part.strip().partition(":")
+        count, _, frequency = rest.partition("@")
+        if kind not in SENSOR_TYPES or not count:
+            raise ValueError(f"Nieprawidłowa specyfikacja czujników: {part}")
+        groups.append({"type": kind, "count": int(count), "frequency": float(frequency or 1)})
+    return groups
+
+
+def build_fleet(groups: list) -> list:
+    sensors = []
+    for group in groups:
+        cls = SENSOR_TYPES[group["type"]]
+        for i in range(group["count"]):
+            sensors.append(cls(f"{group['type']}_{i:05d}", frequency=group.get("frequency", 1)))
+    return sensors
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class FleetWorker:
+    def __init__(self, sensors, host, port, duration, max_batch, wire_format):
+        self.sensors = sensors
+        self.client = NetworkClient(host=host, port=port, batch_size=max_batch, wire_format=wire_format)
+        self.duration = duration
+        self.max_batch = max_batch
+        self.sent = 0
+        self.accepted = 0
+        self.errors = 0
+        self.ack_latencies = []
+        self.lags = []
+
+    def run(self):
+        self.client.connect()
+        start = time.monotonic()
+        deadline = start + self.duration
+        schedule = [
+            (start + random.uniform(0, 1 / sensor.frequency), i, 1 / sensor.frequency)
+            for i, sensor in enumerate(self.sensors)
+        ]
+        heapq.heapify(schedule)
+
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if schedule[0][0] > now:
+                time.sleep(min(schedule[0][0], deadline) - now)
+                continue
+
+            batch = []
+            timestamp = datetime.now().isoformat()
+            while schedule and schedule[0][0] <= now and len(batch) < self.max_batch:
+                due, i, period = heapq.heappop(schedule)
+                sensor = self.sensors[i]
+                self.lags.append(now - due)
+                batch.append({
+                    "sensor": sensor.sensor_id,
+                    "value": sensor.read_value(),
+                    "unit": sensor.unit,
+                    "timestamp": timestamp,
+                })
+                heapq.heappush(schedule, (due + period, i, period))
+
+            sent_at = time.perf_counter()
+            try:
+                accepted = self.client.send_many(batch)
+            except Exception:
+                accepted = 0
+            self.ack_latencies.append(time.perf_counter() - sent_at)
+            self.sent += len(batch)
+            self.accepted += accepted
+            self.errors += len(batch) - accepted
+        self.client.close()
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _spawn_collector(directory):
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({
+            "log_dir": os.path.join(directory, "logs"),
+            "filename_pattern": "sensors_%Y%m%d.csv",
+            "buffer_size": 1000,
+            "rotate_every_hours": 24,
+            "max_size_mb": 1024,
+            "retention_days": 30,
+            "async_writer": True,
+        }, f)
+    port = _free_port()
+    query_port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "server.collector", "--config", config_path,
+         "--port", str(port), "--query-port", str(query_port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 15
+    while True:
+        try:
+            query_collector("STATS", port=query_port, timeout=1.0)
+            return process, port
+        except OSError:
+            if time.monotonic() > deadline:
+                process.kill()
+                raise TimeoutError("Kolektor nie wystartował")
+            time.sleep(0.1)
+
+
+def run(groups, host, port, duration, connections, max_batch, wire_format):
+    sensors = build_fleet(groups)
+    expected = sum(sensor.frequency for sensor in sensors)
+    workers = [
+        FleetWorker(sensors[i::connections], host, port, duration, max_batch, wire_format)
+        for i in range(connections)
+    ]
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    sent = sum(worker.sent for worker in workers)
+    accepted = sum(worker.accepted for worker in workers)
+    errors = sum(worker.errors for worker in workers)
+    latencies = sorted(latency for worker in workers for latency in worker.ack_latencies)
+    lags = sorted(lag for worker in workers for lag in worker.lags)
+
+    print(f"czujniki:               {len(sensors)} (oczekiwane {expected:,.0f} odczytów/s)")
+    print(f"wysłane / przyjęte:     {sent} / {accepted} w {elapsed:.2f} s")
+    print(f"osiągnięta szybkość:    {accepted / elapsed:,.0f} odczytów/s")
+    print(f"błędy:                  {errors}")
+    print(f"opóźnienie ACK (paczka): p50 {_percentile(latencies, 50) * 1000:.2f} ms  "
+          f"p95 {_percentile(latencies, 95) * 1000:.2f} ms  p99 {_percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"spóźnienie odczytów:    p50 {_percentile(lags, 50) * 1000:.2f} ms  "
+          f"p99 {_percentile(lags, 99) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator obciążenia: flota symulowanych czujników")
+    parser.add_argument("--spec", default="temperature:1000@1,humidity:1000@1,pressure:1000@0.5,light:1000@0.5",
+                        help="typ:liczba@częstotliwość,... albo ścieżka do pliku JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="port serwera; bez niego uruchamiany jest kolektor")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--max-batch", type=int, default=500)
+    parser.add_argument("--wire-format", default="json", choices=["json", "binary"])
+    args = parser.parse_args()
+
+    groups = parse_spec(args.spec)
+    if args.port is not None:
+        run(groups, args.host, args.port, args.duration, args.connections, args.max_batch, args.wire_format)
+        return
+
+    directory = tempfile.mkdtemp(prefix="bench_fleet_")
+    process, port = _spawn_collector(directory)
+    try:
+        run(groups, "127.0.0.1", port, args.duration, args.connections, args.max_batch, args.wire_format)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(30)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logger import Logger
+
+
+def _generate(directory, size_mb, sensors, days):
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({
+            "log_dir": directory,
+            "filename_pattern": "sensors_%Y%m%d.csv",
+            "buffer_size": 10000,
+            "rotate_every_hours": 24,
+            "max_size_mb": 1024 * 1024,
+            "retention_days": 36500,
+        }, f)
+
+    rng = random.Random(7)
+    base = datetime(2025, 1, 1)
+    target = size_mb * 1024 * 1024 // days
+    rows = 0
+    for day in range(days):
+        moment = base + timedelta(days=day)
+        path = os.path.join(directory, moment.strftime("sensors_%Y%m%d.csv"))
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "sensor_id", "value", "unit"])
+            while f.tell() < target:
+                batch = []
+                for _ in range(10000):
+                    moment += timedelta(microseconds=rng.randrange(1000, 200000))
+                    batch.append([moment.isoformat(), f"sensor_{rng.randrange(sensors):03d}", round(rng.gauss(20, 5), 2), "°C"])
+                writer.writerows(batch)
+                rows += len(batch)
+    return Logger(config_path), base, base + timedelta(days=days), rows
+
+
+def _measure(label, rows, generator):
+    start = time.perf_counter()
+    count = sum(1 for _ in generator)
+    elapsed = time.perf_counter() - start
+    print(f"{label:48s} {count:>10} wierszy  {elapsed:7.2f} s  {rows / elapsed:>12,.0f} wierszy/s (skan)")
+    return count
+
+
+def run(size_mb, sensors, days, workers):
+    directory = tempfile.mkdtemp(prefix="bench_read_logs_")
+    try:
+        logger, begin, finish, rows = _generate(directory, size_mb, sensors, days)
+        print(f"{rows} wierszy, {size_mb} MB, {days} plików, {sensors} czujników")
+        list(logger._iter_source_rows(begin, finish, None))
+
+        middle = begin + (finish - begin) / 2
+        cases = [
+            ("pełny zakres, dict (dotychczas)", dict(start=begin, end=finish, fast=False)),
+            ("pełny zakres, dict (szybki)", dict(start=begin, end=finish)),
+            ("pełny zakres, tuple (szybki)", dict(start=begin, end=finish, record="tuple")),
+            ("pełny zakres, LogRecord (szybki)", dict(start=begin, end=finish, record="record")),
+            ("1 czujnik, dict (dotychczas)", dict(start=begin, end=finish, sensor_id="sensor_001", fast=False)),
+            ("1 czujnik, tuple (szybki)", dict(start=begin, end=finish, sensor_id="sensor_001", record="tuple")),
+            ("1 godzina, dict (dotychczas)", dict(start=middle, end=middle + timedelta(hours=1), fast=False)),
+            ("1 godzina, dict (szybki)", dict(start=middle, end=middle + timedelta(hours=1))),
+            ("pełny zakres, tuple, 1 proces", dict(start=begin, end=finish, record="tuple", workers=1)),
+        ]
+        if workers > 1:
+            cases += [
+                (f"pełny zakres, tuple, {workers} procesy, kolejność", dict(start=begin, end=finish, record="tuple", workers=workers)),
+                (f"pełny zakres, tuple, {workers} procesy, bez kolejności",
+                 dict(start=begin, end=finish, record="tuple", workers=workers, ordered=False)),
+                (f"1 czujnik, tuple, {workers} procesy", dict(start=begin, end=finish, sensor_id="sensor_001", record="tuple", workers=workers)),
+            ]
+        for label, kwargs in cases:
+            _measure(label, rows, logger.read_logs(**kwargs))
+        logger.stop()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Szybkość odczytu Logger.read_logs")
+    parser.add_argument("--size-mb", type=int, default=2048, help="łączny rozmiar wygenerowanych logów")
+    parser.add_argument("--sensors", type=int, default=50)
+    parser.add_argument("--days", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesy dla zapytań równoległych")
+    args = parser.parse_args()
+    run(args.size_mb, args.sensors, args.days, args.workers)
+
+
+if __name__ == "__main__":
+    main()
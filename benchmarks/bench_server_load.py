@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.server import NetworkServer
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _raise_fd_limit(wanted):
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = min(hard, max(soft, wanted))
+    if target > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def _recv_acks(sock, expected):
+    received = 0
+    while received < expected:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("Serwer zamknął połączenie")
+        received += chunk.count(b"\n")
+
+
+def run(connections, rounds, mode):
+    _raise_fd_limit(connections * 2 + 64)
+    port = _free_port()
+    server = NetworkServer(port=port, mode=mode, on_message=lambda payload: None)
+    server.host = "127.0.0.1"
+    threading.Thread(target=server.start, daemon=True).start()
+    server.ready.wait(5)
+
+    payload = json.dumps({
+        "sensor": "temp_01",
+        "value": 21.5,
+        "unit": "°C",
+        "timestamp": datetime.now().isoformat(),
+    }).encode("utf-8") + b"\n"
+
+    start = time.perf_counter()
+    socks = [socket.create_connection(("127.0.0.1", port)) for _ in range(connections)]
+    connect_time = time.perf_counter() - start
+    time.sleep(0.2)
+    held = server.connections
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for s in socks:
+            s.sendall(payload)
+        for s in socks:
+            _recv_acks(s, 1)
+    elapsed = time.perf_counter() - start
+
+    for s in socks:
+        s.close()
+    server.stop()
+
+    total = connections * rounds
+    print(f"tryb:                 {mode}")
+    print(f"połączenia utrzymane: {held}/{connections} (nawiązane w {connect_time:.2f} s)")
+    print(f"wiadomości:           {total} w {elapsed:.2f} s")
+    print(f"przepustowość:        {total / elapsed:,.0f} msg/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążeniowy NetworkServer")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--mode", default="event_loop", choices=["event_loop", "threaded"])
+    args = parser.parse_args()
+    run(args.connections, args.rounds, args.mode)
+
+
+if __name__ == "__main__":
+    main()
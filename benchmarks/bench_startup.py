@@ -0,0 +1,98 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BUDGETS_MS = {
+    "network.config": 25,
+    "network.client": 50,
+    "server.server": 50,
+    "logger": 80,
+    "server.collector": 100,
+    "gui": 90,
+}
+DEFERRED = {
+    "network.client": ("yaml", "http.server"),
+    "logger": ("yaml", "multiprocessing", "concurrent.futures.process", "http.server", "zipfile"),
+    "server.collector": ("yaml", "multiprocessing", "argparse", "http.server"),
+    "gui": ("logger", "sensors.scheduler", "server.collector", "numpy"),
+}
+
+
+def _importtime(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None, None
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = int(cumulative) / 1000
+    return imports.get(module), imports
+
+
+def _load_config_ms(repeat):
+    from network.config import clear_cache, load_config
+
+    clear_cache()
+    started = time.perf_counter()
+    load_config()
+    cold = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    for _ in range(repeat):
+        load_config()
+    return cold, (time.perf_counter() - started) * 1000 / repeat
+
+
+def run(modules, repeat, scale):
+    failed = []
+    for module in modules:
+        samples = []
+        imports = None
+        for _ in range(repeat):
+            elapsed, imports = _importtime(module)
+            if elapsed is None:
+                break
+            samples.append(elapsed)
+        if not samples:
+            print(f"{module:18s} pominięto (import nieudany, brak zależności?)")
+            continue
+        median = statistics.median(samples)
+        budget = BUDGETS_MS.get(module, float("inf")) * scale
+        eager = [name for name in DEFERRED.get(module, ()) if name in imports]
+        status = "OK" if median <= budget and not eager else "PRZEKROCZONO"
+        print(f"{module:18s} {median:8.1f} ms  (limit {budget:6.1f} ms)  {status}")
+        if eager:
+            print(f"{'':18s} moduły importowane zbyt wcześnie: {', '.join(eager)}")
+        if status != "OK":
+            failed.append(module)
+
+    cold, warm = _load_config_ms(1000)
+    print(f"load_config: pierwsze wczytanie {cold:.2f} ms, z pamięci podręcznej {warm * 1000:.1f} µs")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Czas importu modułów (python -X importtime)")
+    parser.add_argument("--modules", nargs="+", default=list(BUDGETS_MS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="mnożnik limitów dla wolniejszych maszyn")
+    args = parser.parse_args()
+
+    failed = run(args.modules, args.repeat, args.scale)
+    if failed:
+        print(f"Regresja czasu startu: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
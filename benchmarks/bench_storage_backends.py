@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logger import Logger
+
+
+def _disk_usage(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(dirpath, name)) for name in filenames)
+    return total
+
+
+def _make_logger(directory, backend):
+    config = {
+        "log_dir": directory,
+        "filename_pattern": "sensors_%Y%m%d_%H%M%S%f.csv",
+        "buffer_size": 1000,
+        "rotate_every_hours": 24,
+        "max_size_mb": 5,
+        "rotate_after_lines": 100000,
+        "retention_days": 36500,
+        "storage_backend": backend,
+    }
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    return Logger(config_path)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(readings, sensors, hours):
+    base = datetime(2025, 1, 1)
+    step = timedelta(hours=hours) / readings
+    print(f"{readings} odczytów, {sensors} czujników, {hours} h danych")
+    print(f"{'backend':<10}{'zapis s':>9}{'dysk MB':>9}{'B/odczyt':>10}{'skan s':>9}{'skan odczyt/s':>15}{'zapytanie s':>13}")
+
+    for backend in ("csv", "columnar"):
+        directory = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+        try:
+            logger = _make_logger(directory, backend)
+            logger.start()
+
+            def write():
+                rng = random.Random(42)
+                for i in range(readings):
+                    logger.log_reading(f"sensor_{i % sensors:03d}", base + step * i, round(rng.gauss(20, 5), 2), "°C")
+                logger.stop()
+
+            _, write_time = _timed(write)
+            usage = _disk_usage(directory) - os.path.getsize(os.path.join(directory, "config.json"))
+
+            scanned, scan_time = _timed(lambda: sum(1 for _ in logger.read_logs(base, base + timedelta(hours=hours))))
+            assert scanned == readings, (backend, scanned)
+            window_start = base + timedelta(hours=hours / 2)
+            _, query_time = _timed(lambda: sum(1 for _ in logger.read_logs(
+                window_start, window_start + timedelta(hours=1), "sensor_001")))
+
+            print(f"{backend:<10}{write_time:>9.2f}{usage / 1e6:>9.2f}{usage / readings:>10.1f}"
+                  f"{scan_time:>9.2f}{readings / scan_time:>15,.0f}{query_time:>13.4f}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie backendów zapisu Loggera")
+    parser.add_argument("--readings", type=int, default=500000)
+    parser.add_argument("--sensors", type=int, default=20)
+    parser.add_argument("--hours", type=int, default=72)
+    args = parser.parse_args()
+    run(args.readings, args.sensors, args.hours)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import argparse
+import json
+import multiprocessing
+import os
+import selectors
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from network.client import NetworkClient
+from server.collector import query_collector
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(query_port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return query_collector("STATS", port=query_port, timeout=1.0)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError("Kolektor nie wystartował")
+            time.sleep(0.1)
+
+
+def _producer(port, sensors, duration, results):
+    client = NetworkClient(host="127.0.0.1", port=port)
+    client.connect()
+    sent = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        now = datetime.now().isoformat()
+        sent += client.send_many([
+            {"sensor": f"sensor_{i % sensors:04d}", "value": 21.5, "unit": "°C", "timestamp": now}
+            for i in range(500)
+        ])
+    client.close()
+    results.put(sent)
+
+
+def _subscribe(port, sensor_ids, interval, slow):
+    sock = socket.create_connection(("127.0.0.1", port))
+    if slow:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    request = {"seq": 1, "subscribe": sensor_ids or "*", "interval": interval}
+    sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+    return sock
+
+
+def run(subscribers, slow, sensors, filtered, interval, duration):
+    directory = tempfile.mkdtemp(prefix="bench_subscribers_")
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({
+            "log_dir": os.path.join(directory, "logs"),
+            "filename_pattern": "sensors_%Y%m%d.csv",
+            "buffer_size": 1000,
+            "rotate_every_hours": 24,
+            "max_size_mb": 1024,
+            "retention_days": 30,
+            "async_writer": True,
+        }, f)
+
+    port = _free_port()
+    query_port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "server.collector", "--config", config_path, "--port", str(port),
+         "--query-port", str(query_port), "--workers", "1"],
+        cwd=ROOT, stdout=subprocess.DEVNULL
+    )
+    selector = selectors.DefaultSelector()
+    stalled = []
+    try:
+        _wait_ready(query_port)
+        for index in range(subscribers):
+            sensor_ids = [f"sensor_{(index + k) % sensors:04d}" for k in range(filtered)] if filtered else None
+            selector.register(_subscribe(port, sensor_ids, interval, False), selectors.EVENT_READ, bytearray())
+        for _ in range(slow):
+            stalled.append(_subscribe(port, None, interval, True))
+
+        results = multiprocessing.Queue()
+        producer = multiprocessing.Process(target=_producer, args=(port, sensors, duration, results))
+        producer.start()
+
+        updates = 0
+        readings = 0
+        latencies = []
+        deadline = time.monotonic() + duration + 1.0
+        while time.monotonic() < deadline:
+            for key, _ in selector.select(timeout=0.1):
+                chunk = key.fileobj.recv(1 << 20)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    continue
+                buffer = key.data
+                buffer += chunk
+                end = buffer.rfind(b"\n")
+                if end == -1:
+                    continue
+                received = datetime.now()
+                for line in bytes(buffer[:end]).split(b"\n"):
+                    message = json.loads(line) if line.startswith(b"{") else {}
+                    if "update" not in message:
+                        continue
+                    updates += 1
+                    readings += len(message["update"])
+                    if len(latencies) < 100000:
+                        newest = max(reading["timestamp"] for reading in message["update"])
+                        latencies.append((received - datetime.fromisoformat(newest)).total_seconds() * 1000)
+                del buffer[:end + 1]
+
+        producer.join()
+        sent = results.get()
+        stats = query_collector("STATS", port=query_port)
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+        for sock in stalled:
+            sock.close()
+        process.send_signal(signal.SIGTERM)
+        process.wait(30)
+        shutil.rmtree(directory, ignore_errors=True)
+    return sent, updates, readings, latencies, stats["subscriptions"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rozsyłanie odczytów do wielu subskrybentów")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[0, 10, 100, 500])
+    parser.add_argument("--slow", type=int, default=5, help="subskrybenci, którzy nie odbierają danych")
+    parser.add_argument("--sensors", type=int, default=200)
+    parser.add_argument("--filtered", type=int, default=0, help="liczba czujników na subskrybenta (0 = wszystkie)")
+    parser.add_argument("--interval", type=float, default=0.5, help="okres koalescencji w sekundach")
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"czujniki: {args.sensors}  okres: {args.interval} s  wolni subskrybenci: {args.slow}")
+    for subscribers in args.subscribers:
+        sent, updates, readings, latencies, stats = run(
+            subscribers, args.slow if subscribers else 0, args.sensors, args.filtered, args.interval, args.duration
+        )
+        latency = (f"opóźnienie p50 {statistics.median(latencies):7.1f} ms  "
+                   f"max {max(latencies):7.1f} ms") if latencies else "brak aktualizacji"
+        print(f"subskrybenci: {subscribers:4d}  wysłano: {sent / args.duration:10,.0f} msg/s  "
+              f"aktualizacje: {updates:6d}  odczyty: {readings:8d}  {latency}  "
+              f"przepełnienia: {stats['overflows']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from network.binary import BinaryDecoder, BinaryEncoder
+from network.protocol import LineFramer, decode_message, encode_batch
+
+
+def _readings(count, sensors):
+    start = datetime.now()
+    units = ["°C", "%", "hPa", "lx"]
+    return [
+        {
+            "sensor": f"sensor_{i % sensors:04d}",
+            "value": 20.0 + (i % 1000) / 100,
+            "unit": units[i % sensors % len(units)],
+            "timestamp": (start + timedelta(milliseconds=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def _json_single(readings):
+    return b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in readings)
+
+
+def _json_batch(readings, batch_size):
+    frames = []
+    for i in range(0, len(readings), batch_size):
+        records = [json.dumps(r).encode("utf-8") for r in readings[i:i + batch_size]]
+        frames.append(encode_batch(records, i // batch_size + 1))
+    return b"".join(frames)
+
+
+def _binary_single(readings):
+    encoder = BinaryEncoder()
+    return b"".join(encoder.encode([r]) for r in readings)
+
+
+def _binary_batch(readings, batch_size):
+    encoder = BinaryEncoder()
+    return b"".join(
+        encoder.encode(readings[i:i + batch_size], i // batch_size + 1, batch=True)
+        for i in range(0, len(readings), batch_size)
+    )
+
+
+def _decode_json(stream):
+    framer = LineFramer(max_line=len(stream) + 1)
+    count = 0
+    for line in framer.feed(stream):
+        seq, payload = decode_message(line)
+        count += len(payload["batch"]) if "batch" in payload else 1
+    return count
+
+
+def _decode_binary(stream):
+    count = 0
+    for seq, payload in BinaryDecoder(max_frame=len(stream)).feed(stream):
+        count += len(payload["batch"]) if "batch" in payload else 1
+    return count
+
+
+def _measure(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(count, sensors, batch_size):
+    readings = _readings(count, sensors)
+    variants = [
+        ("json", "pojedynczo", _json_single, (readings,), _decode_json),
+        ("json", f"paczki {batch_size}", _json_batch, (readings, batch_size), _decode_json),
+        ("binary", "pojedynczo", _binary_single, (readings,), _decode_binary),
+        ("binary", f"paczki {batch_size}", _binary_batch, (readings, batch_size), _decode_binary),
+    ]
+
+    print(f"{count} odczytów, {sensors} czujników")
+    print(f"{'format':<8}{'tryb':<14}{'B/odczyt':>10}{'enc odczyt/s':>16}{'dec odczyt/s':>16}")
+    for name, mode, encode, args, decode in variants:
+        stream, enc_time = _measure(encode, *args)
+        decoded, dec_time = _measure(decode, stream)
+        assert decoded == count
+        print(f"{name:<8}{mode:<14}{len(stream) / count:>10.1f}"
+              f"{count / enc_time:>16,.0f}{count / dec_time:>16,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie formatów JSON i binarnego")
+    parser.add_argument("--readings", type=int, default=200000)
+    parser.add_argument("--sensors", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    run(args.readings, args.sensors, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
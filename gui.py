@@ -3,15 +3,16 @@ from tkinter import ttk, messagebox
 import threading
 import time
 import socket
-import json
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import defaultdict
 from network.config import load_config
-from sensors.temperature_sensor import TemperatureSensor
-from sensors.humidity_sensor import HumiditySensor
-from sensors.pressure_sensor import PressureSensor
-from sensors.light_sensor import LightSensor
-from logger import Logger
+from network.protocol import MessageReader, encode_ack
+from metrics import start_exporter
+from storage.rolling import RollingStats
+from server.ingest import IngestPipeline
+from server.server import ACCEPTS, BYTES_IN, BYTES_OUT, DECODE_MS
+
+AVERAGE_WINDOWS = (timedelta(hours=1), timedelta(hours=12))
 
 
 class GUIApplication:
@@ -24,29 +25,56 @@ class GUIApplication:
 
         self.server_thread = None
         self.server_running = False
-        self.sensor_loop_running = False
-        self.sensor_thread = None
         self.sensor_data = {}
-        self.sensor_history = defaultdict(deque)
+        self.sensor_history = defaultdict(lambda: RollingStats(AVERAGE_WINDOWS))
         self.lock = threading.Lock()
+        self.refresh_ms = self.config.get("gui_refresh_ms", 3000)
+        self.max_rows = self.config.get("gui_max_rows", 500)
+        self._dirty = set()
+        self._tree_rows = set()
+        self.source = self.config.get("gui_source", "local")
+        self.remote_averages = {}
+
+
+        self.logger = None
+        self.sensors = []
+        self.sensor_scheduler = None
+        if self.source == "local":
+            self._init_local_sources()
+        self.ingest = IngestPipeline(
+            self._apply_readings,
+            shards=self.config.get("ingest_shards", 8),
+            queue_size=self.config.get("ingest_queue_size", 100000),
+            max_batch=self.config.get("ingest_max_batch", 1000)
+        )
+        self.ingest.start()
+        self.exporter = start_exporter(self.config)
 
 
-        self.logger = Logger("config.json")
-        self.logger.start()
+        self._build_ui()
 
 
-        self._build_ui()
+        self._start_updating_gui()
 
+    def _init_local_sources(self):
+        from logger import Logger
+        from sensors.temperature_sensor import TemperatureSensor
+        from sensors.humidity_sensor import HumiditySensor
+        from sensors.pressure_sensor import PressureSensor
+        from sensors.light_sensor import LightSensor
+        from sensors.scheduler import SensorScheduler
 
+        self.logger = Logger("config.json")
+        self.logger.start()
         self.sensors = [
             TemperatureSensor('temp_01', frequency=1),
             HumiditySensor('hum_01', frequency=1),
             PressureSensor('press_01', frequency=1),
             LightSensor('light_01', frequency=1),
         ]
-
-
-        self._start_updating_gui()
+        self.sensor_scheduler = SensorScheduler(self._on_sensor_reading, workers=self.config.get("sensor_workers", 4))
+        for sensor in self.sensors:
+            self.sensor_scheduler.register(sensor)
 
     def _build_ui(self):
 
@@ -73,13 +101,21 @@ class GUIApplication:
             "avg_1h": "Śr. z 1h",
             "avg_12h": "Śr. z 12h"
         }
-        self.tree = ttk.Treeview(self.root, columns=columns, show="headings", height=10)
+        tree_frame = ttk.Frame(self.root)
+        tree_frame.pack(padx=10, pady=10, fill="both", expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=10)
         for col in columns:
             self.tree.heading(col, text=headers[col])
             self.tree.column(col, anchor="center", width=120)
-        self.tree.pack(padx=10, pady=10, fill="both", expand=True)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
 
 
+        self.ingest_var = tk.StringVar()
+        ttk.Label(self.root, textvariable=self.ingest_var, anchor="w").pack(fill="x", padx=10)
+
         self.status_var = tk.StringVar()
         self.status_label = ttk.Label(self.root, textvariable=self.status_var, relief="sunken", anchor="w")
         self.status_label.pack(fill="x", padx=10, pady=(0, 5))
@@ -96,20 +132,25 @@ class GUIApplication:
             return
 
         self.server_running = True
+        self.start_button.config(state="disabled")
+        self.stop_button.config(state="normal")
+        if self.source == "collector":
+            self.server_thread = threading.Thread(target=self._poll_collector, daemon=True)
+            self.server_thread.start()
+            self._update_status("Podgląd danych z kolektora uruchomiony.")
+            return
+
         self.server_thread = threading.Thread(target=self._run_server, args=(port,), daemon=True)
         self.server_thread.start()
 
-        self.sensor_loop_running = True
-        self.sensor_thread = threading.Thread(target=self._sensor_loop, daemon=True)
-        self.sensor_thread.start()
+        self.sensor_scheduler.start()
 
-        self.start_button.config(state="disabled")
-        self.stop_button.config(state="normal")
         self._update_status(f"Serwer i czujniki uruchomione na porcie {port}.")
 
     def stop_server(self):
         self.server_running = False
-        self.sensor_loop_running = False
+        if self.sensor_scheduler is not None:
+            self.sensor_scheduler.stop()
         self.start_button.config(state="normal")
         self.stop_button.config(state="disabled")
         self._update_status("Serwer i czujniki zatrzymane.")
@@ -123,6 +164,7 @@ class GUIApplication:
                     s.settimeout(1.0)
                     try:
                         client_socket, addr = s.accept()
+                        ACCEPTS.inc()
                         threading.Thread(target=self._handle_client, args=(client_socket,), daemon=True).start()
                     except socket.timeout:
                         continue
@@ -135,62 +177,117 @@ class GUIApplication:
 
     def _handle_client(self, client_socket):
         with client_socket:
+            reader = MessageReader(allow_binary=self.config.get("wire_format") == "binary")
             try:
-                data = client_socket.recv(4096)
-                decoded = data.decode("utf-8").strip()
-                payload = json.loads(decoded)
-
-                sensor_id = payload["sensor"]
-                value = payload["value"]
-                unit = payload["unit"]
-                timestamp = datetime.fromisoformat(payload["timestamp"])
-
-                with self.lock:
-                    self.sensor_data[sensor_id] = (value, unit, timestamp)
-                    self.sensor_history[sensor_id].append((timestamp, value))
-                    self.logger.log_reading(sensor_id, timestamp, value, unit)
+                while self.server_running:
+                    data = client_socket.recv(4096)
+                    if not data:
+                        break
+                    BYTES_IN.inc(len(data))
+                    with DECODE_MS.time():
+                        messages, reply = reader.feed(data)
+                    acks = bytearray(reply)
+                    for seq, payload in messages:
+                        if "batch" in payload:
+                            readings = []
+                            for reading in payload["batch"]:
+                                try:
+                                    readings.append(self._parse_payload(reading))
+                                except Exception as e:
+                                    print(f"Błąd odczytu w paczce: {e}")
+                            self.ingest.submit(readings)
+                            acks += encode_ack(seq, len(readings))
+                        else:
+                            self.ingest.submit([self._parse_payload(payload)])
+                            acks += encode_ack(seq)
+                    if acks:
+                        client_socket.sendall(acks)
+                        BYTES_OUT.inc(len(acks))
 
             except Exception as e:
                 print(f"Błąd klienta: {e}")
 
-    def _sensor_loop(self):
-        while self.sensor_loop_running:
-            now = datetime.now()
-            for sensor in self.sensors:
-                if sensor.active:
-                    value = sensor.read_value()
-                    with self.lock:
-                        self.sensor_data[sensor.sensor_id] = (value, sensor.unit, now)
-                        self.sensor_history[sensor.sensor_id].append((now, value))
-                        self.logger.log_reading(sensor.sensor_id, now, value, sensor.unit)
-            time.sleep(2)
+    def _parse_payload(self, payload):
+        return payload["sensor"], datetime.fromisoformat(payload["timestamp"]), payload["value"], payload["unit"]
+
+    def _apply_readings(self, readings):
+        with self.lock:
+            for sensor_id, timestamp, value, unit in readings:
+                self.sensor_data[sensor_id] = (value, unit, timestamp)
+                self.sensor_history[sensor_id].add(timestamp, value)
+                self._dirty.add(sensor_id)
+        for sensor_id, timestamp, value, unit in readings:
+            self.logger.log_reading(sensor_id, timestamp, value, unit)
+
+    def _on_sensor_reading(self, sensor, timestamp, value):
+        self.ingest.submit([(sensor.sensor_id, timestamp, value, sensor.unit)])
+
+
+
+    def _poll_collector(self):
+        from server.collector import query_collector
+
+        while self.server_running:
+            try:
+                latest = query_collector("LATEST")
+            except Exception as e:
+                print(f"Błąd połączenia z kolektorem: {e}")
+                latest = {}
+            with self.lock:
+                for sensor_id, reading in latest.items():
+                    timestamp = datetime.fromisoformat(reading["timestamp"])
+                    self.sensor_data[sensor_id] = (reading["value"], reading["unit"], timestamp)
+                    self.remote_averages[sensor_id] = (reading["avg_1h"], reading["avg_12h"])
+                    self._dirty.add(sensor_id)
+            time.sleep(self.refresh_ms / 1000)
 
 
 
     def _start_updating_gui(self):
         def update():
+            now = datetime.now()
+            snapshot = []
             with self.lock:
-                self.tree.delete(*self.tree.get_children())
-                for sensor_id, (value, unit, timestamp) in self.sensor_data.items():
-                    avg_1h = self._compute_average(sensor_id, timedelta(hours=1))
-                    avg_12h = self._compute_average(sensor_id, timedelta(hours=12))
-                    self.tree.insert("", "end", values=(
-                        sensor_id, f"{value:.2f}", unit, timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                        f"{avg_1h:.2f}" if avg_1h is not None else "-",
-                        f"{avg_12h:.2f}" if avg_12h is not None else "-"
-                    ))
-            self.root.after(3000, update)
+                for sensor_id, history in self.sensor_history.items():
+                    if history.expire(now):
+                        self._dirty.add(sensor_id)
+                dirty, self._dirty = self._dirty, set()
+                free_rows = self.max_rows - len(self._tree_rows)
+                for sensor_id in sorted(dirty):
+                    if sensor_id not in self._tree_rows:
+                        if free_rows <= 0:
+                            self._dirty.add(sensor_id)
+                            continue
+                        free_rows -= 1
+                    value, unit, timestamp = self.sensor_data[sensor_id]
+                    if sensor_id in self.remote_averages:
+                        avg_1h, avg_12h = self.remote_averages[sensor_id]
+                    else:
+                        history = self.sensor_history[sensor_id]
+                        avg_1h, avg_12h = history.mean(AVERAGE_WINDOWS[0]), history.mean(AVERAGE_WINDOWS[1])
+                    snapshot.append((sensor_id, value, unit, timestamp, avg_1h, avg_12h))
+
+            for sensor_id, value, unit, timestamp, avg_1h, avg_12h in snapshot:
+                values = (
+                    sensor_id, f"{value:.2f}", unit, timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                    f"{avg_1h:.2f}" if avg_1h is not None else "-",
+                    f"{avg_12h:.2f}" if avg_12h is not None else "-"
+                )
+                if sensor_id in self._tree_rows:
+                    self.tree.item(sensor_id, values=values)
+                else:
+                    self.tree.insert("", "end", iid=sensor_id, values=values)
+                    self._tree_rows.add(sensor_id)
+
+            stats = self.ingest.stats()
+            self.ingest_var.set(
+                f"Kolejka: {stats['queue_depth']} | Śr. paczka: {stats['avg_batch_size']:.1f} | "
+                f"Śr. opóźnienie: {stats['avg_latency_ms']:.1f} ms | Maks. opóźnienie: {stats['max_latency_ms']:.1f} ms"
+            )
+            self.root.after(self.refresh_ms, update)
 
         self.root.after(1000, update)
 
-    def _compute_average(self, sensor_id, period):
-        now = datetime.now()
-        readings = self.sensor_history[sensor_id]
-        values = [v for t, v in readings if now - t <= period]
-        if not values:
-            return None
-        return sum(values) / len(values)
-
 
 def main():
     root = tk.Tk()
@@ -199,7 +296,11 @@ def main():
     def on_close():
         print("Zamykanie aplikacji...")
         app.stop_server()
-        app.logger.stop()
+        app.ingest.stop()
+        if app.logger is not None:
+            app.logger.stop()
+        if app.exporter is not None:
+            app.exporter.stop()
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_close)
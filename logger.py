@@ -1,23 +1,109 @@
 import os
+import re
 import csv
-import json
-import zipfile
+import heapq
+import time
+import locale
+import threading
+import importlib.util
+from collections import deque
+from itertools import chain
 from datetime import datetime, timedelta
-from typing import Optional, Iterator, Dict
+from typing import Optional, Iterator, Iterable, Dict, List
+from storage.blockarchive import block_archive_stats, list_blocks, read_block_archive, write_block_archive
+from storage.columnar import ColumnarStore, to_epoch_us, from_epoch_us
+from storage.index import ActiveFileIndex, FileStats, LogIndex
+from storage.query import csv_ranges, file_reader, filter_rows, scan_file, tuple_record
+from storage.rollup import RollupStore, parse_tiers
+from metrics import REGISTRY
+from network.config import BACKPRESSURE_POLICIES, load_config
+
+ARCHIVE_EXTENSION = '.blk'
+LEGACY_ARCHIVE_EXTENSIONS = ('.zip',)
+CODEC_MODULES = {'deflate': None, 'zstd': 'zstandard', 'lz4': 'lz4'}
+
+FLUSH_MS = REGISTRY.histogram('logger_flush_ms')
+ROWS_WRITTEN = REGISTRY.counter('logger_rows_written_total')
+ROTATION_MS = REGISTRY.histogram('logger_rotation_handoff_ms')
+COMPRESSION_MS = REGISTRY.histogram('logger_compression_ms')
+RETENTION_MS = REGISTRY.histogram('logger_retention_ms')
+ROWS_SCANNED = REGISTRY.counter('logger_rows_scanned_total')
+ROWS_RETURNED = REGISTRY.counter('logger_rows_returned_total')
+ROLLUP_QUERIES = REGISTRY.counter('logger_rollup_queries_total')
+
+
+class LogRecord:
+    __slots__ = ('timestamp', 'sensor_id', 'value', 'unit')
+
+    def __init__(self, timestamp: datetime, sensor_id: str, value: float, unit: str):
+        self.timestamp = timestamp
+        self.sensor_id = sensor_id
+        self.value = value
+        self.unit = unit
+
+    def __repr__(self):
+        return f"LogRecord({self.timestamp.isoformat()}, {self.sensor_id}, {self.value}, {self.unit})"
+
+
+RECORD_FACTORIES = {
+    'dict': lambda timestamp, sensor_id, value, unit: {
+        'timestamp': timestamp, 'sensor_id': sensor_id, 'value': value, 'unit': unit
+    },
+    'tuple': lambda timestamp, sensor_id, value, unit: (timestamp, sensor_id, value, unit),
+    'record': LogRecord,
+}
+RECORD_TIMESTAMPS = {
+    'dict': lambda row: row['timestamp'],
+    'tuple': lambda row: row[0],
+    'record': lambda row: row.timestamp,
+}
 
 class Logger:
-    def __init__(self, config_path: str):
-        with open(config_path, 'r') as cfg_file:
-            config = json.load(cfg_file)
+    def __init__(self, config_path: str, worker: Optional[int] = None):
+        config = load_config(os.path.abspath(config_path))
 
         self.log_dir = config['log_dir']
         self.archive_dir = os.path.join(self.log_dir, 'archive')
-        self.filename_pattern = config['filename_pattern']
+        self.worker = worker
+        pattern = config['filename_pattern']
+        if '{worker}' not in pattern:
+            root, ext = os.path.splitext(pattern)
+            sharded_pattern = f"{root}_{{worker}}{ext}"
+        else:
+            sharded_pattern = pattern
+        if worker is None:
+            self.filename_pattern = pattern.replace('{worker}', '')
+        else:
+            self.filename_pattern = sharded_pattern.replace('{worker}', f'w{worker}')
+        sharded_root, sharded_ext = os.path.splitext(sharded_pattern)
+        self._shard_regex = re.compile(
+            re.sub(r'%[a-zA-Z]', '.+?', re.escape(sharded_root)).replace(re.escape('{worker}'), r'(?P<worker>w\d+)')
+            + r'(?:\.\d+)?' + re.escape(sharded_ext)
+        )
         self.buffer_limit = config['buffer_size']
         self.rotation_hours = config['rotate_every_hours']
         self.max_file_size_bytes = config['max_size_mb'] * 1024 * 1024
         self.rotation_line_limit = config.get('rotate_after_lines')
         self.retention_days = config['retention_days']
+        self.async_writer = config.get('async_writer', False)
+        self.queue_size = config.get('queue_size', 10000)
+        self.backpressure = config.get('backpressure', 'block')
+        if self.backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Nieznana polityka przepełnienia kolejki: {self.backpressure}")
+        self.flush_interval = config.get('flush_interval_s', 1.0)
+        self.fsync_interval = config.get('fsync_interval_s')
+        self.index_block_rows = config.get('index_block_rows', 5000)
+        self.storage_backend = config.get('storage_backend', 'csv')
+        self.compression = self._resolve_codec(config.get('compression', 'deflate'))
+        self.compression_level = config.get('compression_level')
+        self.compression_workers = config.get('compression_workers', 2)
+        self.archive_block_rows = config.get('archive_block_rows', 20000)
+        self.query_workers = config.get('query_workers', 1)
+        self.query_prefetch = config.get('query_prefetch')
+        self.rotation_metrics = deque(maxlen=100)
+        self._archiver = None
+        self._query_pool = None
+        self._query_pool_workers = 0
 
         os.makedirs(self.log_dir, exist_ok=True)
         os.makedirs(self.archive_dir, exist_ok=True)
@@ -28,37 +114,161 @@ class Logger:
         self._current_log_path = None
         self._log_start_time = None
         self._lines_written = 0
+        self._last_fsync = time.monotonic()
+        index_name = 'index.json' if worker is None else f'index_w{worker}.json'
+        self._index = LogIndex(os.path.join(self.log_dir, index_name))
+        self._active_index = None
+        self._file_size = 0
+        self._store = None
+        if self.storage_backend == 'columnar':
+            if worker is not None:
+                raise ValueError("Logger z numerem procesu roboczego wymaga backendu csv")
+            self._store = ColumnarStore(
+                os.path.join(self.log_dir, 'columnar'),
+                block_hours=config.get('columnar_block_hours', 1),
+                value_type=config.get('columnar_value_type', 'd')
+            )
+        self._rollups = None
+        if config.get('rollup_tiers'):
+            self._rollups = RollupStore(
+                os.path.join(self.log_dir, 'rollups'),
+                parse_tiers(config['rollup_tiers']),
+                suffix='' if worker is None else f'_w{worker}'
+            )
+
+        self._write_lock = threading.RLock()
+        self._queue = deque()
+        self._queue_space = threading.Condition()
+        self._queue_ready = threading.Event()
+        self._writer_thread = None
+        self._writer_running = False
+        self.dropped = 0
+        REGISTRY.gauge('logger_buffer_rows', lambda: len(self._buffer))
+        REGISTRY.gauge('logger_queue_depth', lambda: self.queue_depth)
+        REGISTRY.gauge('logger_dropped', lambda: self.dropped)
 
 
 
     def start(self):
+        if self._store is None:
+            self._open_file()
+        if self.async_writer and not self._writer_running:
+            self._writer_running = True
+            self._writer_thread = threading.Thread(target=self._writer_loop, name="logger-writer", daemon=True)
+            self._writer_thread.start()
+
+    def _open_file(self):
         self._log_start_time = datetime.now()
         self._current_log_path = os.path.join(
             self.log_dir, self._log_start_time.strftime(self.filename_pattern)
         )
         file_exists = os.path.isfile(self._current_log_path)
+        self._active_index = ActiveFileIndex(self.index_block_rows)
+        self._lines_written = 0
+
+        if file_exists:
+            self._file_size = os.path.getsize(self._current_log_path)
+            previous = self._index.lookup(os.path.basename(self._current_log_path), self._current_log_path)
+            self._active_index.add_region(0, self._file_size, previous)
 
         self._file = open(self._current_log_path, 'a', newline='')
         self._csv_writer = csv.writer(self._file)
 
         if not file_exists:
             self._csv_writer.writerow(['timestamp', 'sensor_id', 'value', 'unit'])
+            self._file.flush()
+            self._file_size = os.fstat(self._file.fileno()).st_size
 
 
 
     def stop(self):
+        if self._writer_thread:
+            self._writer_running = False
+            self._queue_ready.set()
+            self._writer_thread.join()
+            self._writer_thread = None
+            self._drain_queue()
+        self._close_file()
+        if self._rollups is not None:
+            self._rollups.flush()
+        if self._archiver is not None:
+            self._archiver.shutdown(wait=True)
+            self._archiver = None
+        if self._query_pool is not None:
+            self._query_pool.shutdown(wait=True)
+            self._query_pool = None
+
+    def _close_file(self):
         self._flush_buffer()
         if self._file:
             self._file.close()
             self._file = None
+            self._store_file_stats()
+
+    def _store_file_stats(self):
+        stats = self._active_index.file_stats()
+        if stats is None:
+            stats = FileStats()
+            for row in self._iter_byte_range(self._current_log_path, 0, os.path.getsize(self._current_log_path)):
+                if row and row[0] != 'timestamp':
+                    stats.add(row[0], row[1])
+        self._index.store(os.path.basename(self._current_log_path), self._current_log_path, stats)
+        self._index.save()
 
 
 
     def log_reading(self, sensor_id: str, timestamp: datetime, value: float, unit: str):
-        self._buffer.append([timestamp.isoformat(), sensor_id, value, unit])
+        if self._writer_thread:
+            self._enqueue((timestamp, sensor_id, value, unit))
+            return
+        self._buffer.append((timestamp, sensor_id, value, unit))
         if len(self._buffer) >= self.buffer_limit:
-            self._flush_buffer()
-            self._evaluate_rotation()
+            with self._write_lock:
+                self._flush_buffer()
+                self._evaluate_rotation()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _enqueue(self, reading):
+        if len(self._queue) >= self.queue_size:
+            if self.backpressure == 'block':
+                with self._queue_space:
+                    while len(self._queue) >= self.queue_size and self._writer_running:
+                        self._queue_ready.set()
+                        self._queue_space.wait(0.1)
+            elif self.backpressure == 'drop_oldest':
+                try:
+                    self._queue.popleft()
+                except IndexError:
+                    pass
+                with self._queue_space:
+                    self.dropped += 1
+            elif self.backpressure == 'count_dropped':
+                with self._queue_space:
+                    self.dropped += 1
+                return
+        self._queue.append(reading)
+        if len(self._queue) >= self.buffer_limit:
+            self._queue_ready.set()
+
+    def _writer_loop(self):
+        while self._writer_running or self._queue:
+            self._queue_ready.wait(self.flush_interval)
+            self._queue_ready.clear()
+            self._drain_queue()
+
+    def _drain_queue(self):
+        while self._queue:
+            count = min(len(self._queue), self.buffer_limit)
+            for _ in range(count):
+                self._buffer.append(self._queue.popleft())
+            with self._queue_space:
+                self._queue_space.notify_all()
+            with self._write_lock:
+                self._flush_buffer()
+                self._evaluate_rotation()
 
 
 
@@ -66,59 +276,345 @@ class Logger:
         self,
         start: datetime,
         end: datetime,
-        sensor_id: Optional[str] = None
-    ) -> Iterator[Dict]:
-        def _read_csv_file(path):
-            with open(path, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    row_time = datetime.fromisoformat(row['timestamp'])
-                    if start <= row_time <= end:
-                        if sensor_id is None or row['sensor_id'] == sensor_id:
-                            yield {
-                                'timestamp': row_time,
-                                'sensor_id': row['sensor_id'],
-                                'value': float(row['value']),
-                                'unit': row['unit']
-                            }
-
-
-
-        def _read_zip_file(path):
-            with zipfile.ZipFile(path) as archive:
-                for member in archive.namelist():
-                    with archive.open(member) as file:
-                        content = file.read().decode().splitlines()
-                        reader = csv.DictReader(content)
-                        for row in reader:
-                            row_time = datetime.fromisoformat(row['timestamp'])
-                            if start <= row_time <= end:
-                                if sensor_id is None or row['sensor_id'] == sensor_id:
-                                    yield {
-                                        'timestamp': row_time,
-                                        'sensor_id': row['sensor_id'],
-                                        'value': float(row['value']),
-                                        'unit': row['unit']
-                                    }
-
-
+        sensor_id: Optional[str] = None,
+        fast: bool = True,
+        record: str = 'dict',
+        workers: Optional[int] = None,
+        ordered: bool = True,
+        prefetch: Optional[int] = None
+    ) -> Iterator:
+        make_record = RECORD_FACTORIES[record]
+        record_timestamp = RECORD_TIMESTAMPS[record]
+        workers = self.query_workers if workers is None else workers
+        counts = [0, 0]
+
+        def select_rows(rows):
+            return filter_rows(rows, start, end, sensor_id, make_record, fast, counts)
+
+        def _sorted_shard(files):
+            for entry in files:
+                yield from sorted(
+                    select_rows(self._iter_source_rows(start, end, sensor_id, [entry])),
+                    key=record_timestamp
+                )
+
+
+        try:
+            shards = list(self._source_files().values())
+            if workers > 1:
+                prefetch = prefetch or self.query_prefetch or 2 * workers
+                for row in self._read_logs_parallel(start, end, sensor_id, fast, workers, ordered, prefetch, counts):
+                    counts[1] += 1
+                    yield make_record(*row)
+            elif len(shards) == 1:
+                yield from select_rows(self._iter_source_rows(start, end, sensor_id, shards[0]))
+            elif shards:
+                yield from heapq.merge(*(_sorted_shard(files) for files in shards), key=record_timestamp)
+            if self._store is not None:
+                for row in self._store.read(start, end, sensor_id):
+                    counts[0] += 1
+                    counts[1] += 1
+                    yield row if record == 'dict' else make_record(row['timestamp'], row['sensor_id'], row['value'], row['unit'])
+        finally:
+            ROWS_SCANNED.inc(counts[0])
+            ROWS_RETURNED.inc(counts[1])
+
+
+    def _read_logs_parallel(self, start, end, sensor_id, fast, workers, ordered, prefetch, counts):
+        from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+        tasks = []
+        learned = []
+        partial = {}
+        active_path = self._current_log_path if self._file else None
+        for shard_files in self._source_files().values():
+            for path, key in shard_files:
+                if active_path and os.path.abspath(path) == os.path.abspath(active_path):
+                    tasks.append((datetime.min, path, key, None, None))
+                    continue
+                stats = self._index.lookup(key, path)
+                if stats is not None and not stats.may_match(start, end, sensor_id):
+                    continue
+                if path.endswith(ARCHIVE_EXTENSION):
+                    blocks = list_blocks(path)
+                    if stats is None:
+                        stats = FileStats()
+                        for _, _, block_stats in blocks:
+                            stats.merge(block_stats)
+                        learned.append((key, path, stats))
+                    for begin, stop, block_stats in blocks:
+                        if block_stats.may_match(start, end, sensor_id):
+                            tasks.append((datetime.fromisoformat(block_stats.min_ts), path, key, False, (begin, stop)))
+                    continue
+                parts = csv_ranges(path) if path.endswith('.csv') else [None]
+                lower_bound = datetime.min if stats is None else datetime.fromisoformat(stats.min_ts)
+                if stats is None:
+                    partial[key] = [len(parts), FileStats()]
+                for part in parts:
+                    tasks.append((lower_bound, path, key, stats is None, part))
+        tasks.sort(key=lambda task: task[0])
+
+        pool = self._get_query_pool(workers)
+        pending = deque()
+        remaining = iter(tasks)
+
+        def _submit_next():
+            for lower_bound, path, key, collect, part in remaining:
+                if collect is None:
+                    future = Future()
+                    scanned = [0, 0]
+                    rows = list(filter_rows(
+                        self._iter_source_rows(start, end, sensor_id, [(path, key)]),
+                        start, end, sensor_id, tuple_record, fast, scanned
+                    ))
+                    if ordered:
+                        rows.sort(key=lambda row: row[0])
+                    future.set_result((rows, None, scanned[0]))
+                else:
+                    future = pool.submit(scan_file, path, start, end, sensor_id, collect, ordered, fast, part)
+                pending.append((lower_bound, future, path, key))
+                return True
+            return False
+
+        def _result(entry):
+            _, future, path, key = entry
+            rows, stats, scanned = future.result()
+            counts[0] += scanned
+            if stats is not None:
+                collected = partial[key]
+                collected[0] -= 1
+                collected[1].merge(FileStats.from_dict(stats))
+                if not collected[0]:
+                    learned.append((key, path, collected[1]))
+            return rows
+
+        try:
+            while len(pending) < prefetch and _submit_next():
+                pass
+
+            if not ordered:
+                while pending:
+                    wait([future for _, future, _, _ in pending], return_when=FIRST_COMPLETED)
+                    for entry in [entry for entry in pending if entry[1].done()]:
+                        pending.remove(entry)
+                        _submit_next()
+                        yield from _result(entry)
+                return
+
+            heap = []
+            order = 0
+            while True:
+                while pending and (not heap or pending[0][0] <= heap[0][0]):
+                    rows = _result(pending.popleft())
+                    _submit_next()
+                    if rows:
+                        heapq.heappush(heap, (rows[0][0], order, 0, rows))
+                        order += 1
+                if not heap:
+                    return
+                _, file_order, position, rows = heap[0]
+                yield rows[position]
+                position += 1
+                if position < len(rows):
+                    heapq.heapreplace(heap, (rows[position][0], file_order, position, rows))
+                else:
+                    heapq.heappop(heap)
+        finally:
+            for _, future, _, _ in pending:
+                future.cancel()
+            if learned:
+                for key, path, stats in learned:
+                    self._index.store(key, path, stats)
+                self._index.save()
+
+
+    def _get_query_pool(self, workers):
+        if self._query_pool is not None and self._query_pool_workers != workers:
+            self._query_pool.shutdown(wait=True)
+            self._query_pool = None
+        if self._query_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            self._query_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            self._query_pool_workers = workers
+        return self._query_pool
+
+
+    def aggregate(
+        self,
+        start: datetime,
+        end: datetime,
+        bucket='1h',
+        sensor_ids: Optional[Iterable[str]] = None,
+        stats: Iterable[str] = ('count', 'min', 'max', 'mean'),
+        chunk_rows: int = 100000,
+        use_rollups: bool = True
+    ) -> List[Dict]:
+        from storage.aggregate import Aggregator, iter_chunks
+
+        aggregator = Aggregator(start, end, bucket, stats, chunk_rows)
+        wanted = set(sensor_ids) if sensor_ids is not None else None
+        single = next(iter(wanted)) if wanted is not None and len(wanted) == 1 else None
+
+        ranges = [(start, end, None)]
+        plan = None
+        if use_rollups and self._rollups is not None and not aggregator.percentiles:
+            plan = self._rollups.plan(start, end, aggregator.bucket_us, self.retention_days)
+        if plan is not None:
+            tier, first_us, last_us = plan
+            ROLLUP_QUERIES.inc()
+            aggregator.add_rollups(self._rollups.read(tier, first_us, last_us, wanted))
+            ranges = []
+            if to_epoch_us(start) < first_us:
+                ranges.append((start, from_epoch_us(first_us), (to_epoch_us(start), first_us)))
+            if to_epoch_us(end) >= last_us:
+                ranges.append((from_epoch_us(last_us), end, (last_us, to_epoch_us(end) + 1)))
+
+        for range_start, range_end, window in ranges:
+            if window is not None:
+                aggregator.set_window(*window)
+            for rows in iter_chunks(self._iter_source_rows(range_start, range_end, single), chunk_rows):
+                aggregator.add_rows(rows, wanted)
+            if self._store is not None:
+                for sid, unit, timestamps, values in self._store.iter_columns(range_start, range_end, single):
+                    if wanted is None or sid in wanted:
+                        aggregator.add_columns(sid, timestamps, values)
+        return aggregator.results()
+
+    def rebuild_rollups(self):
+        if self._rollups is None:
+            return
+        with self._write_lock:
+            self._flush_buffer()
+            readings = (
+                (datetime.fromisoformat(row[0]), row[1], float(row[2]), row[3])
+                for row in self._iter_source_rows(datetime.min, datetime.max, None)
+                if row and row[0] != 'timestamp'
+            )
+            if self._store is not None:
+                readings = chain(readings, (
+                    (from_epoch_us(ts), sid, value, unit)
+                    for sid, unit, timestamps, values in self._store.iter_columns(datetime.min, datetime.max)
+                    for ts, value in zip(timestamps, values)
+                ))
+            self._rollups.rebuild(readings)
+        self._rollups.apply_retention()
+
+
+    def _source_files(self) -> Dict[Optional[str], List[tuple]]:
+        files = []
         for filename in os.listdir(self.log_dir):
             if filename.endswith('.csv'):
-                yield from _read_csv_file(os.path.join(self.log_dir, filename))
+                files.append((filename, os.path.join(self.log_dir, filename), filename))
+        csv_names = {name for name, _, _ in files}
         for filename in os.listdir(self.archive_dir):
-            if filename.endswith('.zip'):
-                yield from _read_zip_file(os.path.join(self.archive_dir, filename))
+            name, ext = os.path.splitext(filename)
+            if (ext == ARCHIVE_EXTENSION or ext in LEGACY_ARCHIVE_EXTENSIONS) and name not in csv_names:
+                key = os.path.join('archive', filename)
+                files.append((name, os.path.join(self.archive_dir, filename), key))
+
+        shards = {}
+        for name, path, key in sorted(files):
+            match = self._shard_regex.fullmatch(name)
+            shards.setdefault(match.group('worker') if match else None, []).append((path, key))
+        return shards
+
+
+    def _iter_source_rows(self, start, end, sensor_id, files=None):
+        if files is None:
+            files = [entry for shard_files in self._source_files().values() for entry in shard_files]
+        active_path = self._current_log_path if self._file else None
+        for path, key in files:
+            if key.endswith(ARCHIVE_EXTENSION):
+                yield from self._block_archive_rows(key, path, start, end, sensor_id)
+            elif active_path and os.path.abspath(path) == os.path.abspath(active_path):
+                for range_start, range_end in self._active_index.ranges(start, end, sensor_id):
+                    yield from self._iter_byte_range(path, range_start, range_end)
+            else:
+                yield from self._indexed_rows(key, path, file_reader(path), start, end, sensor_id)
+
+
+    def _indexed_rows(self, key, path, read_rows, start, end, sensor_id):
+        stats = self._index.lookup(key, path)
+        if stats is not None:
+            if stats.may_match(start, end, sensor_id):
+                yield from read_rows(path)
+            return
+
+        file_stat = os.stat(path)
+        stats = FileStats()
+        for row in read_rows(path):
+            if row and row[0] != 'timestamp':
+                stats.add(row[0], row[1])
+            yield row
+        self._index.store(key, path, stats, file_stat)
+        self._index.save()
+
+
+    def _block_archive_rows(self, key, path, start, end, sensor_id):
+        stats = self._index.lookup(key, path)
+        if stats is None:
+            stats = block_archive_stats(path)
+            self._index.store(key, path, stats)
+            self._index.save()
+        if stats.may_match(start, end, sensor_id):
+            yield from read_block_archive(path, start, end, sensor_id)
+
+
+    def _iter_byte_range(self, path, range_start, range_end, chunk_size=1 << 20):
+        encoding = locale.getpreferredencoding(False)
+        with open(path, 'rb') as f:
+            f.seek(range_start)
+            remaining = range_end - range_start
+            tail = b''
+            while remaining > 0:
+                chunk = f.read(min(remaining, chunk_size))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                chunk = tail + chunk
+                cut = chunk.rfind(b'\n') + 1 if remaining > 0 else len(chunk)
+                tail = chunk[cut:]
+                yield from csv.reader(chunk[:cut].decode(encoding).splitlines())
+            if tail:
+                yield from csv.reader(tail.decode(encoding).splitlines())
 
 
     def _flush_buffer(self):
-        if self._file and self._buffer:
-            self._csv_writer.writerows(self._buffer)
-            self._lines_written += len(self._buffer)
+        with self._write_lock:
+            if not self._buffer:
+                return
+            started = time.perf_counter()
+            flushed = len(self._buffer)
+            if self._store is not None:
+                self._store.append(self._buffer)
+                self._lines_written += len(self._buffer)
+            elif self._file:
+                rows = [[timestamp.isoformat(), sensor_id, value, unit] for timestamp, sensor_id, value, unit in self._buffer]
+                self._csv_writer.writerows(rows)
+                self._lines_written += len(rows)
+                self._file.flush()
+                start_offset = self._file_size
+                self._file_size = os.fstat(self._file.fileno()).st_size
+                self._active_index.add(start_offset, self._file_size, rows)
+                if self.fsync_interval is not None and time.monotonic() - self._last_fsync >= self.fsync_interval:
+                    os.fsync(self._file.fileno())
+                    self._last_fsync = time.monotonic()
+            else:
+                return
+            if self._rollups is not None:
+                self._rollups.add(self._buffer)
             self._buffer.clear()
-            self._file.flush()
+            FLUSH_MS.observe((time.perf_counter() - started) * 1000)
+            ROWS_WRITTEN.inc(flushed)
 
 
     def _evaluate_rotation(self):
+        if self._store is not None:
+            self._store.apply_retention(self.retention_days)
+            if self._rollups is not None:
+                self._rollups.apply_retention()
+            return
         rotate = False
         elapsed_time = datetime.now() - self._log_start_time
         file_size = os.path.getsize(self._current_log_path)
@@ -134,19 +630,77 @@ class Logger:
 
 
     def _rotate_log(self):
-        self.stop()
-        self._compress_log()
-        self._remove_old_archives()
-        self.start()
-
-
-    def _compress_log(self):
-        archive_filename = os.path.basename(self._current_log_path) + '.zip'
+        started = time.perf_counter()
+        self._close_file()
+        rotated_path = self._current_log_path
+        if os.path.join(self.log_dir, datetime.now().strftime(self.filename_pattern)) == rotated_path:
+            rotated_path = self._rename_rotated(rotated_path)
+        self._open_file()
+        metrics = {
+            'file': os.path.basename(rotated_path),
+            'rotated_at': datetime.now(),
+            'handoff_ms': (time.perf_counter() - started) * 1000,
+        }
+        ROTATION_MS.observe(metrics['handoff_ms'])
+        if self._archiver is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._archiver = ThreadPoolExecutor(max_workers=self.compression_workers, thread_name_prefix='logger-archive')
+        self._archiver.submit(self._archive_rotated, rotated_path, metrics)
+
+
+    def _rename_rotated(self, log_path):
+        root, ext = os.path.splitext(log_path)
+        renamed_path = f"{root}.{self._log_start_time.strftime('%H%M%S%f')}{ext}"
+        os.replace(log_path, renamed_path)
+        stats = self._index.lookup(os.path.basename(log_path), renamed_path)
+        if stats is not None:
+            self._index.store(os.path.basename(renamed_path), renamed_path, stats)
+        self._index.discard(os.path.basename(log_path))
+        return renamed_path
+
+
+    def _archive_rotated(self, log_path, metrics):
+        try:
+            started = time.perf_counter()
+            metrics['codec'] = self.compression
+            metrics['size_in'] = os.path.getsize(log_path)
+            metrics['size_out'] = self._compress_log(log_path)
+            metrics['compress_ms'] = (time.perf_counter() - started) * 1000
+            COMPRESSION_MS.observe(metrics['compress_ms'])
+
+            started = time.perf_counter()
+            self._remove_old_archives()
+            metrics['retention_ms'] = (time.perf_counter() - started) * 1000
+            RETENTION_MS.observe(metrics['retention_ms'])
+        except Exception as e:
+            metrics['error'] = str(e)
+            print(f"[LOGGER] Błąd archiwizacji {log_path}: {e}")
+        self.rotation_metrics.append(metrics)
+
+
+    def _resolve_codec(self, codec):
+        if codec not in CODEC_MODULES:
+            raise ValueError(f"Nieznany kodek kompresji: {codec}")
+        module = CODEC_MODULES.get(codec)
+        if module is not None and importlib.util.find_spec(module) is None:
+            print(f"[LOGGER] Brak modułu {module}, archiwa będą kompresowane algorytmem deflate")
+            return 'deflate'
+        return codec
+
+
+    def _compress_log(self, log_path) -> int:
+        log_filename = os.path.basename(log_path)
+        archive_filename = log_filename + ARCHIVE_EXTENSION
         archive_path = os.path.join(self.archive_dir, archive_filename)
+        tmp_path = archive_path + '.tmp'
+
+        stats = write_block_archive(log_path, tmp_path, self.compression, self.compression_level, self.archive_block_rows)
+        os.replace(tmp_path, archive_path)
 
-        with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
-            zip_file.write(self._current_log_path, arcname=os.path.basename(self._current_log_path))
-        os.remove(self._current_log_path)
+        self._index.store(os.path.join('archive', archive_filename), archive_path, stats)
+        self._index.discard(log_filename)
+        os.remove(log_path)
+        return os.path.getsize(archive_path)
 
 
     def _remove_old_archives(self):
@@ -154,6 +708,13 @@ class Logger:
         for archive_file in os.listdir(self.archive_dir):
             full_path = os.path.join(self.archive_dir, archive_file)
             if os.path.isfile(full_path):
-                modified_time = datetime.fromtimestamp(os.path.getmtime(full_path))
-                if (now - modified_time).days > self.retention_days:
-                    os.remove(full_path)
+                try:
+                    modified_time = datetime.fromtimestamp(os.path.getmtime(full_path))
+                    if (now - modified_time).days > self.retention_days:
+                        os.remove(full_path)
+                        self._index.discard(os.path.join('archive', archive_file))
+                except FileNotFoundError:
+                    continue
+        self._index.save()
+        if self._rollups is not None:
+            self._rollups.apply_retention()
@@ -0,0 +1,359 @@
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter as _SampleCounter
+from datetime import datetime
+from typing import Optional
+
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Counter:
+    __slots__ = ("name", "value", "_lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    __slots__ = ("name", "value", "fn")
+
+    def __init__(self, name: str, fn=None):
+        self.name = name
+        self.value = 0
+        self.fn = fn
+
+    def set(self, value):
+        self.value = value
+
+    def read(self):
+        return self.fn() if self.fn is not None else self.value
+
+
+class Histogram:
+    __slots__ = ("name", "buckets", "counts", "count", "total", "max", "_lock")
+
+    def __init__(self, name: str, buckets=LATENCY_BUCKETS_MS):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def time(self):
+        return _Timer(self)
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            maximum = self.max
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, maximum)
+        return maximum
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self.counts)
+            count, total, maximum = self.count, self.total, self.max
+        cumulative = []
+        seen = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            seen += bucket_count
+            cumulative.append(("+Inf" if bound == float("inf") else bound, seen))
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "max": maximum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": cumulative,
+        }
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe((time.perf_counter() - self.started) * 1000)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str) -> Counter:
+        return self._get(name, Counter, lambda: Counter(name))
+
+    def gauge(self, name: str, fn=None) -> Gauge:
+        gauge = self._get(name, Gauge, lambda: Gauge(name))
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name: str, buckets=LATENCY_BUCKETS_MS) -> Histogram:
+        return self._get(name, Histogram, lambda: Histogram(name, buckets))
+
+    def _get(self, name, kind, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            elif not isinstance(metric, kind):
+                raise ValueError(f"Metryka {name} jest już zarejestrowana jako {type(metric).__name__}")
+            return metric
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        result = {"timestamp": datetime.now().isoformat(), "counters": {}, "gauges": {}, "histograms": {}}
+        for name, metric in metrics:
+            if isinstance(metric, Counter):
+                result["counters"][name] = metric.value
+            elif isinstance(metric, Gauge):
+                try:
+                    result["gauges"][name] = metric.read()
+                except Exception:
+                    result["gauges"][name] = None
+            else:
+                result["histograms"][name] = metric.snapshot()
+        return result
+
+    def render_text(self, snapshot: Optional[dict] = None) -> str:
+        snapshot = snapshot or self.snapshot()
+        lines = []
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name} {value}")
+        for name, value in snapshot.get("rates", {}).items():
+            lines.append(f"{name}_per_s {value:.3f}")
+        for name, value in snapshot["gauges"].items():
+            lines.append(f"{name} {'NaN' if value is None else value}")
+        for name, hist in snapshot["histograms"].items():
+            for bound, count in hist["buckets"]:
+                lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{name}_sum {hist['sum']:.3f}")
+            lines.append(f"{name}_count {hist['count']}")
+            lines.append(f"{name}_max {hist['max']:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.01, depth: int = 32):
+        self.interval = interval
+        self.depth = depth
+        self.samples = 0
+        self._stacks = _SampleCounter()
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="metrics-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def top(self, limit: int = 20) -> list:
+        leaves = _SampleCounter()
+        with self._lock:
+            for stack, count in self._stacks.items():
+                leaves[stack[-1]] += count
+        return leaves.most_common(limit)
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = self._stacks.most_common()
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in items)
+
+    def _run(self):
+        own = threading.get_ident()
+        while self._running:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, frame in frames.items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                stacks.append(tuple(reversed(stack)))
+            del frames
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+
+class MetricsExporter:
+    def __init__(self, registry: MetricsRegistry = REGISTRY, path: Optional[str] = None, interval: float = 10.0,
+                 port: Optional[int] = None, host: str = "127.0.0.1", profiler: Optional[SamplingProfiler] = None):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.port = port
+        self.host = host
+        self.profiler = profiler
+        self._previous = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._http = None
+
+    def start(self):
+        if self.profiler is not None:
+            self.profiler.start()
+        if self.path:
+            self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+            self._thread.start()
+        if self.port is not None:
+            self._start_http()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+        if self.profiler is not None:
+            self.profiler.stop()
+        if self.path:
+            self.write_snapshot()
+
+    def snapshot(self) -> dict:
+        snapshot = self.registry.snapshot()
+        now = time.monotonic()
+        if self._previous is not None:
+            previous_time, previous_counters = self._previous
+            elapsed = now - previous_time
+            if elapsed > 0:
+                snapshot["rates"] = {
+                    name: (value - previous_counters.get(name, 0)) / elapsed
+                    for name, value in snapshot["counters"].items()
+                }
+        self._previous = (now, snapshot["counters"])
+        if self.profiler is not None:
+            snapshot["profile"] = {"samples": self.profiler.samples, "top": self.profiler.top()}
+        return snapshot
+
+    def write_snapshot(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                print(f"[METRYKI] Błąd zapisu migawki: {e}")
+
+    def _start_http(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = exporter.registry.render_text(), "text/plain; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(exporter.registry.snapshot()), "application/json"
+                elif self.path == "/profile" and exporter.profiler is not None:
+                    body, content_type = exporter.profiler.collapsed(), "text/plain; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._http.daemon_threads = True
+        threading.Thread(target=self._http.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[METRYKI] Punkt końcowy http://{self.host}:{self._http.server_address[1]}/metrics")
+
+
+def start_exporter(config: dict, registry: MetricsRegistry = REGISTRY, worker: Optional[int] = None) -> Optional[MetricsExporter]:
+    path = config.get("metrics_file")
+    port = config.get("metrics_port")
+    if not path and port is None:
+        return None
+    if path and worker is not None:
+        root, ext = os.path.splitext(path)
+        path = f"{root}_w{worker}{ext}"
+    if port is not None and worker is not None:
+        port += worker
+    profiler = None
+    if config.get("metrics_profile", False):
+        profiler = SamplingProfiler(interval=config.get("metrics_profile_interval_ms", 10) / 1000)
+    exporter = MetricsExporter(
+        registry,
+        path=path,
+        interval=config.get("metrics_interval_s", 10.0),
+        port=port,
+        host=config.get("metrics_host", "127.0.0.1"),
+        profiler=profiler
+    )
+    exporter.start()
+    return exporter
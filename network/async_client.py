@@ -0,0 +1,97 @@
+import asyncio
+import json
+import time
+from typing import Optional
+from network.binary import BinaryEncoder
+from network.client import (ACK_RTT_MS, BYTES_IN, BYTES_OUT, CONNECT_ERRORS, CONNECTS, SEND_ERRORS,
+                            SEND_FAILURES, backoff_delay)
+from network.config import load_config
+from network.protocol import encode_hello, parse_ack
+
+
+class AsyncNetworkClient:
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None,
+                 timeout: Optional[float] = None, retries: Optional[int] = None,
+                 wire_format: Optional[str] = None):
+        config = load_config()
+        self.host = host or config["host"]
+        self.port = port or config["port"]
+        self.timeout = timeout or config.get("timeout", 5.0)
+        self.retries = retries or config.get("retries", 3)
+        self.wire_format = wire_format or config.get("wire_format", "json")
+        self.backoff_base = config.get("backoff_base", 0.1)
+        self.backoff_max = config.get("backoff_max", 5.0)
+        self.reader = None
+        self.writer = None
+        self._binary = False
+        self._encoder = BinaryEncoder()
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+            self._encoder.reset()
+            self._binary = self.wire_format == "binary" and await self._negotiate()
+            CONNECTS.inc()
+        except Exception:
+            CONNECT_ERRORS.inc()
+            raise
+
+    async def send(self, data: dict) -> bool:
+        async with self._lock:
+            for attempt in range(self.retries):
+                try:
+                    frame = self._frame(data)
+                    started = time.perf_counter()
+                    self.writer.write(frame)
+                    await self.writer.drain()
+                    BYTES_OUT.inc(len(frame))
+                    line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+                    if not line:
+                        raise ConnectionError("Serwer zamknął połączenie")
+                    BYTES_IN.inc(len(line))
+                    parse_ack(line)
+                    ACK_RTT_MS.observe((time.perf_counter() - started) * 1000)
+                    return True
+                except Exception:
+                    SEND_ERRORS.inc()
+                    try:
+                        await self._reconnect(attempt)
+                    except Exception:
+                        continue
+
+        SEND_FAILURES.inc()
+        return False
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.reader = None
+            self.writer = None
+
+    async def _reconnect(self, attempt: int):
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+        await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+        await self.connect()
+
+    async def _negotiate(self) -> bool:
+        self.writer.write(encode_hello("binary"))
+        await self.writer.drain()
+        line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+        return line.split()[1:] == [b"binary"]
+
+    def _frame(self, data: dict) -> bytes:
+        if self._binary:
+            return self._encoder.encode([data])
+        return self._serialize(data) + b"\n"
+
+    def _serialize(self, data: dict) -> bytes:
+        return json.dumps(data).encode("utf-8")
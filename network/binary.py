@@ -0,0 +1,180 @@
+import json
+import struct
+from datetime import datetime
+
+FRAME_HEADER = struct.Struct("!BI")
+DEFINE_ENTRY = struct.Struct("!HBB")
+RECORDS_HEADER = struct.Struct("!BII")
+RECORD = struct.Struct("!Hdq")
+
+FRAME_DEFINE = 1
+FRAME_RECORDS = 2
+FRAME_JSON = 3
+
+FLAG_BATCH = 1
+
+READING_KEYS = frozenset(("sensor", "value", "unit", "timestamp"))
+NS_PER_SECOND = 1_000_000_000
+
+
+def timestamp_to_ns(timestamp: str) -> int:
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is not None:
+        raise ValueError("Znacznik czasu ze strefą czasową nie jest obsługiwany")
+    return int(moment.replace(microsecond=0).timestamp()) * NS_PER_SECOND + moment.microsecond * 1000
+
+
+class BinaryEncoder:
+    def __init__(self):
+        self._ids = {}
+        self._last_prefix = None
+        self._last_seconds = None
+
+    def reset(self):
+        self._ids.clear()
+
+    def encode(self, readings: list, seq=None, batch: bool = False) -> bytes:
+        try:
+            definitions, records = self._pack_records(readings)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return self._encode_json(readings, seq, batch)
+
+        frames = []
+        if definitions:
+            frames.append(self._encode_definitions(definitions))
+        header = RECORDS_HEADER.pack(FLAG_BATCH if batch else 0, seq or 0, len(records))
+        body = header + b"".join(records)
+        frames.append(FRAME_HEADER.pack(FRAME_RECORDS, len(body)) + body)
+        return b"".join(frames)
+
+    def _pack_records(self, readings):
+        definitions = {}
+        records = []
+        for reading in readings:
+            if reading.keys() != READING_KEYS or isinstance(reading["value"], bool):
+                raise ValueError("Odczyt nie pasuje do formatu binarnego")
+            key = (reading["sensor"], reading["unit"])
+            sensor_key = self._ids.get(key)
+            if sensor_key is None:
+                sensor_key = definitions.get(key)
+            if sensor_key is None:
+                sensor_key = len(self._ids) + len(definitions)
+                if sensor_key > 0xFFFF:
+                    raise ValueError("Przekroczono limit słownika czujników")
+                if len(key[0].encode("utf-8")) > 0xFF or len(key[1].encode("utf-8")) > 0xFF:
+                    raise ValueError("Zbyt długi identyfikator czujnika lub jednostka")
+                definitions[key] = sensor_key
+            records.append(RECORD.pack(sensor_key, float(reading["value"]), self._timestamp_ns(reading["timestamp"])))
+        self._ids.update(definitions)
+        return definitions, records
+
+    def _timestamp_ns(self, timestamp: str) -> int:
+        rest = timestamp[19:]
+        if rest and not (len(rest) == 7 and rest[0] == "." and rest[1:].isdigit()):
+            return timestamp_to_ns(timestamp)
+        prefix = timestamp[:19]
+        if prefix != self._last_prefix:
+            self._last_seconds = timestamp_to_ns(prefix)
+            self._last_prefix = prefix
+        return self._last_seconds + (int(rest[1:]) * 1000 if rest else 0)
+
+    def _encode_definitions(self, definitions: dict) -> bytes:
+        parts = []
+        for (sensor_id, unit), sensor_key in definitions.items():
+            sensor_raw = sensor_id.encode("utf-8")
+            unit_raw = unit.encode("utf-8")
+            parts.append(DEFINE_ENTRY.pack(sensor_key, len(sensor_raw), len(unit_raw)) + sensor_raw + unit_raw)
+        body = b"".join(parts)
+        return FRAME_HEADER.pack(FRAME_DEFINE, len(body)) + body
+
+    def _encode_json(self, readings, seq, batch):
+        message = {"batch": readings} if batch else dict(readings[0])
+        if seq is not None:
+            message["seq"] = seq
+        body = json.dumps(message).encode("utf-8")
+        return FRAME_HEADER.pack(FRAME_JSON, len(body)) + body
+
+
+class BinaryDecoder:
+    def __init__(self, max_frame: int = 16 * 1024 * 1024):
+        self.max_frame = max_frame
+        self._buffer = bytearray()
+        self._sensors = {}
+        self._last_second = None
+        self._last_prefix = None
+
+    def feed(self, chunk: bytes) -> list:
+        self._buffer += chunk
+        messages = []
+        offset = 0
+        available = len(self._buffer)
+        while available - offset >= FRAME_HEADER.size:
+            kind, length = FRAME_HEADER.unpack_from(self._buffer, offset)
+            if length > self.max_frame:
+                raise ValueError("Przekroczono maksymalny rozmiar ramki")
+            start = offset + FRAME_HEADER.size
+            if available - start < length:
+                break
+            body = bytes(self._buffer[start:start + length])
+            offset = start + length
+
+            try:
+                if kind == FRAME_DEFINE:
+                    self._read_definitions(body)
+                elif kind == FRAME_RECORDS:
+                    messages.append(self._read_records(body))
+                elif kind == FRAME_JSON:
+                    payload = json.loads(body)
+                    if not isinstance(payload, dict):
+                        raise ValueError("Ramka JSON musi zawierać obiekt")
+                    messages.append((payload.pop("seq", None), payload))
+                else:
+                    raise ValueError(f"Nieznany typ ramki: {kind}")
+            except (struct.error, KeyError, OverflowError, OSError) as e:
+                raise ValueError(f"Uszkodzona ramka typu {kind}: {e!r}") from None
+        if offset:
+            del self._buffer[:offset]
+        return messages
+
+    def _read_definitions(self, body: bytes):
+        offset = 0
+        while offset < len(body):
+            sensor_key, sensor_len, unit_len = DEFINE_ENTRY.unpack_from(body, offset)
+            offset += DEFINE_ENTRY.size
+            sensor_id = body[offset:offset + sensor_len].decode("utf-8")
+            offset += sensor_len
+            unit = body[offset:offset + unit_len].decode("utf-8")
+            offset += unit_len
+            if offset > len(body):
+                raise ValueError("Niekompletna definicja czujnika w ramce")
+            self._sensors[sensor_key] = (sensor_id, unit)
+
+    def _read_records(self, body: bytes):
+        flags, seq, count = RECORDS_HEADER.unpack_from(body)
+        readings = []
+        for sensor_key, value, ns in RECORD.iter_unpack(body[RECORDS_HEADER.size:]):
+            sensor_id, unit = self._sensors[sensor_key]
+            readings.append({
+                "sensor": sensor_id,
+                "value": value,
+                "unit": unit,
+                "timestamp": self._timestamp(ns),
+            })
+        if len(readings) != count:
+            raise ValueError("Niezgodna liczba rekordów w ramce")
+        if not flags & FLAG_BATCH and count != 1:
+            raise ValueError("Ramka pojedynczego odczytu musi zawierać dokładnie jeden rekord")
+        seq = seq or None
+        if flags & FLAG_BATCH:
+            return seq, {"batch": readings}
+        return seq, readings[0]
+
+    def _timestamp(self, ns: int) -> str:
+        seconds, rest = divmod(ns, NS_PER_SECOND)
+        if seconds != self._last_second:
+            self._last_second = seconds
+            self._last_prefix = datetime.fromtimestamp(seconds).isoformat()
+        microsecond = rest // 1000
+        if microsecond:
+            return f"{self._last_prefix}.{microsecond:06d}"
+        return self._last_prefix
@@ -1,56 +1,241 @@
 import socket
 import json
+import random
 import time
+from collections import OrderedDict
 from typing import Optional
+from metrics import REGISTRY
 from network.config import load_config
+from network.binary import RECORD, BinaryEncoder
+from network.protocol import LineFramer, encode_batch, encode_hello, parse_ack
+
+CONNECTS = REGISTRY.counter("client_connects_total")
+CONNECT_ERRORS = REGISTRY.counter("client_connect_errors_total")
+SEND_ERRORS = REGISTRY.counter("client_send_errors_total")
+SEND_FAILURES = REGISTRY.counter("client_send_failures_total")
+BYTES_OUT = REGISTRY.counter("client_bytes_out_total")
+BYTES_IN = REGISTRY.counter("client_bytes_in_total")
+ACK_RTT_MS = REGISTRY.histogram("client_ack_rtt_ms")
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
 
 class NetworkClient:
     def __init__(self, host: Optional[str] = None, port: Optional[int] = None,
-                 timeout: Optional[float] = None, retries: Optional[int] = None, logger=None):
+                 timeout: Optional[float] = None, retries: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, batch_size: Optional[int] = None,
+                 batch_max_bytes: Optional[int] = None, wire_format: Optional[str] = None):
         config = load_config()
         self.host = host or config["host"]
         self.port = port or config["port"]
         self.timeout = timeout or config.get("timeout", 5.0)
         self.retries = retries or config.get("retries", 3)
-        self.logger = logger
+        self.max_in_flight = max_in_flight or config.get("max_in_flight", 64)
+        self.batch_size = batch_size or config.get("batch_size", 500)
+        self.batch_max_bytes = batch_max_bytes or config.get("batch_max_bytes", 64 * 1024)
+        self.backoff_base = config.get("backoff_base", 0.1)
+        self.backoff_max = config.get("backoff_max", 5.0)
+        self.wire_format = wire_format or config.get("wire_format", "json")
         self.sock = None
+        self._binary = False
+        self._encoder = BinaryEncoder()
+        self._seq = 0
+        self._in_flight = OrderedDict()
+        self._sent_at = {}
+        self._ack_framer = LineFramer()
 
     def connect(self):
         try:
             self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
-            if self.logger:
-                self.logger.log_reading("network", time.time(), 0, "Połączono z serwerem")
-        except Exception as e:
-            if self.logger:
-                self.logger.log_reading("network", time.time(), 0, f"Błąd połączenia: {e}")
+            self._ack_framer = LineFramer()
+            self._encoder.reset()
+            self._binary = self.wire_format == "binary" and self._negotiate()
+            CONNECTS.inc()
+        except Exception:
+            CONNECT_ERRORS.inc()
             raise
 
     def send(self, data: dict) -> bool:
-        payload = self._serialize(data)
-
         for attempt in range(self.retries):
             try:
-                self.sock.sendall(payload + b"\n")
-                ack = self.sock.recv(1024).strip()
-                if ack == b"ACK":
-                    if self.logger:
-                        self.logger.log_reading("network", time.time(), 0, "Potwierdzenie ACK otrzymane")
+                frame = self._frame(data)
+                started = time.perf_counter()
+                self.sock.sendall(frame)
+                BYTES_OUT.inc(len(frame))
+                ack = self.sock.recv(1024)
+                BYTES_IN.inc(len(ack))
+                if ack.strip() == b"ACK":
+                    ACK_RTT_MS.observe((time.perf_counter() - started) * 1000)
                     return True
-            except Exception as e:
-                if self.logger:
-                    self.logger.log_reading("network", time.time(), 0, f"Błąd wysyłania: {e}")
-                self.connect()
+            except Exception:
+                SEND_ERRORS.inc()
+                try:
+                    self._reconnect(attempt)
+                except Exception:
+                    continue
 
-        if self.logger:
-            self.logger.log_reading("network", time.time(), 0, "Nie udało się wysłać danych po kilku próbach")
+        SEND_FAILURES.inc()
         return False
 
+    def send_many(self, readings) -> int:
+        if self._in_flight and not self.flush():
+            return 0
+
+        accepted = 0
+        records = []
+        size = 0
+        for reading in readings:
+            if self._binary:
+                record, record_size = reading, RECORD.size
+            else:
+                record = self._serialize(reading)
+                record_size = len(record) + 1
+            if records and (len(records) >= self.batch_size or size + record_size > self.batch_max_bytes):
+                accepted += self._send_batch(records)
+                records = []
+                size = 0
+            records.append(record)
+            size += record_size
+        if records:
+            accepted += self._send_batch(records)
+        return accepted
+
+    def _send_batch(self, records: list) -> int:
+        self._seq += 1
+        binary = self._binary
+
+        for attempt in range(self.retries):
+            try:
+                if binary != self._binary:
+                    raise ConnectionError("Serwer zmienił format przesyłania danych")
+                if binary:
+                    frame = self._encoder.encode(records, self._seq, batch=True)
+                else:
+                    frame = encode_batch(records, self._seq)
+                started = time.perf_counter()
+                self.sock.sendall(frame)
+                BYTES_OUT.inc(len(frame))
+                while True:
+                    chunk = self.sock.recv(1024)
+                    if not chunk:
+                        raise ConnectionError("Serwer zamknął połączenie")
+                    BYTES_IN.inc(len(chunk))
+                    for line in self._ack_framer.feed(chunk):
+                        ack = parse_ack(line)
+                        if ack.get("seq") == self._seq:
+                            ACK_RTT_MS.observe((time.perf_counter() - started) * 1000)
+                            return ack.get("count", len(records))
+            except Exception:
+                SEND_ERRORS.inc()
+                try:
+                    self._reconnect(attempt)
+                except Exception:
+                    continue
+
+        SEND_FAILURES.inc()
+        return 0
+
+    def send_pipelined(self, data: dict) -> int:
+        if not self._drain(self.max_in_flight - 1):
+            raise ConnectionError("Nie udało się zwolnić okna niepotwierdzonych wiadomości")
+
+        self._seq += 1
+        seq = self._seq
+        self._in_flight[seq] = data
+        self._sent_at[seq] = time.perf_counter()
+
+        try:
+            frame = self._frame(data, seq)
+            self.sock.sendall(frame)
+            BYTES_OUT.inc(len(frame))
+        except Exception:
+            SEND_ERRORS.inc()
+            self._reconnect_and_resend()
+        return seq
+
+    def flush(self) -> bool:
+        if self._drain(0):
+            return True
+        SEND_FAILURES.inc()
+        return False
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def _drain(self, limit: int) -> bool:
+        for attempt in range(self.retries):
+            try:
+                while len(self._in_flight) > limit:
+                    self._await_acks()
+                return True
+            except Exception:
+                SEND_ERRORS.inc()
+                try:
+                    self._reconnect_and_resend(attempt)
+                except Exception:
+                    continue
+        return False
+
+    def _await_acks(self):
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("Serwer zamknął połączenie")
+        BYTES_IN.inc(len(chunk))
+        now = time.perf_counter()
+        for line in self._ack_framer.feed(chunk):
+            ack = parse_ack(line)
+            if "seq" in ack:
+                while self._in_flight and next(iter(self._in_flight)) <= ack["seq"]:
+                    self._acknowledge(now)
+            elif self._in_flight:
+                self._acknowledge(now)
+
+    def _acknowledge(self, now: float):
+        seq, _ = self._in_flight.popitem(last=False)
+        started = self._sent_at.pop(seq, None)
+        if started is not None:
+            ACK_RTT_MS.observe((now - started) * 1000)
+
+    def _reconnect(self, attempt: int = 0):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+        time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+        self.connect()
+
+    def _reconnect_and_resend(self, attempt: int = 0):
+        self._reconnect(attempt)
+        if self._in_flight:
+            frames = b"".join(self._frame(data, seq) for seq, data in self._in_flight.items())
+            self.sock.sendall(frames)
+            BYTES_OUT.inc(len(frames))
+
+    def _negotiate(self) -> bool:
+        self.sock.sendall(encode_hello("binary"))
+        while True:
+            chunk = self.sock.recv(1024)
+            if not chunk:
+                raise ConnectionError("Serwer zamknął połączenie")
+            lines = self._ack_framer.feed(chunk)
+            if lines:
+                return lines[0].split()[1:] == [b"binary"]
+
+    def _frame(self, data: dict, seq=None) -> bytes:
+        if self._binary:
+            return self._encoder.encode([data], seq)
+        if seq is not None:
+            data = {**data, "seq": seq}
+        return self._serialize(data) + b"\n"
+
     def close(self):
         if self.sock:
             self.sock.close()
             self.sock = None
-            if self.logger:
-                self.logger.log_reading("network", time.time(), 0, "Zamknięto połączenie z serwerem")
 
     def _serialize(self, data: dict) -> bytes:
         return json.dumps(data).encode("utf-8")
@@ -1,8 +1,196 @@
+import json
 import os
-import yaml
+import threading
+from collections.abc import Mapping
 
-def load_config(path="config.yaml"):
-    project_root = os.path.dirname(os.path.dirname(__file__))
-    config_path = os.path.join(project_root, path)
-    with open(config_path, "r") as f:
+ENV_PREFIX = "SENSORS_"
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "count_dropped")
+ROLLUP_TIERS = [
+    {"name": "1min", "bucket": "1min", "retention_days": 90},
+    {"name": "1h", "bucket": "1h", "retention_days": 3650},
+]
+
+
+class Field:
+    __slots__ = ("kind", "default", "nullable", "choices")
+
+    def __init__(self, kind, default=None, nullable=False, choices=None):
+        self.kind = kind
+        self.default = default
+        self.nullable = nullable or default is None
+        self.choices = choices
+
+
+SCHEMA = {
+    "host": Field(str, "127.0.0.1"),
+    "port": Field(int, 5000),
+    "timeout": Field(float, 5.0),
+    "retries": Field(int, 3),
+    "server_mode": Field(str, "threaded", choices=("threaded", "event_loop")),
+    "backlog": Field(int, 1024),
+    "max_in_flight": Field(int, 64),
+    "batch_size": Field(int, 500),
+    "batch_max_bytes": Field(int, 64 * 1024),
+    "wire_format": Field(str, "json", choices=("json", "binary")),
+    "backoff_base": Field(float, 0.1),
+    "backoff_max": Field(float, 5.0),
+    "pool_size": Field(int, 8),
+    "pool_idle_timeout": Field(float, 60.0),
+    "reuse_port": Field(bool, False),
+    "subscribe_interval_s": Field(float, 1.0),
+    "subscribe_min_interval_s": Field(float, 0.05),
+    "subscriber_buffer_bytes": Field(int, 256 * 1024),
+    "gui_refresh_ms": Field(int, 3000),
+    "gui_max_rows": Field(int, 500),
+    "gui_source": Field(str, "local", choices=("local", "collector")),
+    "sensor_workers": Field(int, 4),
+    "ingest_shards": Field(int, 8),
+    "ingest_queue_size": Field(int, 100000),
+    "ingest_max_batch": Field(int, 1000),
+    "collector_query_host": Field(str, "127.0.0.1"),
+    "collector_query_port": Field(int, 5001),
+    "collector_workers": Field(int, 1),
+    "metrics_file": Field(str),
+    "metrics_interval_s": Field(float, 10.0),
+    "metrics_port": Field(int),
+    "metrics_host": Field(str, "127.0.0.1"),
+    "metrics_profile": Field(bool, False),
+    "metrics_profile_interval_ms": Field(float, 10.0),
+    "log_dir": Field(str, "./logs"),
+    "filename_pattern": Field(str, "sensors_%Y%m%d.csv"),
+    "buffer_size": Field(int, 200),
+    "rotate_every_hours": Field(float, 24),
+    "max_size_mb": Field(float, 5),
+    "rotate_after_lines": Field(int),
+    "retention_days": Field(float, 30),
+    "async_writer": Field(bool, False),
+    "queue_size": Field(int, 10000),
+    "backpressure": Field(str, "block", choices=BACKPRESSURE_POLICIES),
+    "flush_interval_s": Field(float, 1.0),
+    "fsync_interval_s": Field(float),
+    "index_block_rows": Field(int, 5000),
+    "storage_backend": Field(str, "csv", choices=("csv", "columnar")),
+    "columnar_block_hours": Field(float, 1),
+    "columnar_value_type": Field(str, "d", choices=("d", "f")),
+    "compression": Field(str, "deflate", choices=("deflate", "zstd", "lz4")),
+    "compression_level": Field(int),
+    "compression_workers": Field(int, 2),
+    "archive_block_rows": Field(int, 20000),
+    "query_workers": Field(int, 1),
+    "query_prefetch": Field(int),
+    "rollup_tiers": Field(list, ROLLUP_TIERS, nullable=True),
+}
+
+
+class Config(Mapping):
+    __slots__ = ("path", "_values")
+
+    def __init__(self, path: str, values: dict):
+        self.path = path
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        return f"Config({self.path!r}, {self._values!r})"
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_config(path="config.yaml") -> Config:
+    if not os.path.isabs(path):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(project_root, path)
+    stat = os.stat(path)
+    env = tuple(sorted((key, value) for key, value in os.environ.items() if key.startswith(ENV_PREFIX)))
+    signature = (stat.st_mtime_ns, stat.st_size, env)
+
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    config = validate(path, _parse(path), dict(env))
+    with _cache_lock:
+        _cache[path] = (signature, config)
+    return config
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def validate(path: str, data, env=None) -> Config:
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise ValueError(f"Plik konfiguracyjny {path} musi zawierać mapę klucz-wartość")
+    values = {key: field.default for key, field in SCHEMA.items()}
+    for key, value in data.items():
+        field = SCHEMA.get(key)
+        if field is None:
+            print(f"[KONFIGURACJA] Nieznany klucz '{key}' w {path}")
+            values[key] = value
+        else:
+            values[key] = _check(path, key, field, value)
+    for name, raw in (env or {}).items():
+        key = name[len(ENV_PREFIX):].lower()
+        field = SCHEMA.get(key)
+        if field is None:
+            continue
+        values[key] = _check(name, key, field, _from_env(name, field, raw))
+    return Config(path, values)
+
+
+def _parse(path):
+    with open(path, "r") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        import yaml
         return yaml.safe_load(f)
+
+
+def _check(source, key, field, value):
+    if value is None:
+        if field.nullable:
+            return None
+        raise ValueError(f"Brak wartości '{key}' w {source}")
+    if field.kind is float and isinstance(value, int) and not isinstance(value, bool):
+        value = float(value)
+    elif (field.kind is int and isinstance(value, bool)) or not isinstance(value, field.kind):
+        raise ValueError(f"Nieprawidłowa wartość '{key}' w {source}: oczekiwano {field.kind.__name__}, otrzymano {value!r}")
+    if field.choices is not None and value not in field.choices:
+        raise ValueError(f"Nieprawidłowa wartość '{key}' w {source}: {value!r}, dozwolone: {', '.join(field.choices)}")
+    return value
+
+
+def _from_env(name: str, field, raw: str):
+    if raw.strip().lower() in ("", "null", "none"):
+        return None
+    if field.kind is bool:
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if field.kind is list:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            raise ValueError(f"Nieprawidłowa wartość zmiennej środowiskowej {name}: {raw!r}") from None
+    try:
+        return field.kind(raw)
+    except ValueError:
+        raise ValueError(f"Nieprawidłowa wartość zmiennej środowiskowej {name}: {raw!r}") from None
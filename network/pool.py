@@ -0,0 +1,138 @@
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+from network.client import NetworkClient, backoff_delay
+from network.config import load_config
+
+
+class ConnectionPool:
+    def __init__(self, max_size: Optional[int] = None, idle_timeout: Optional[float] = None,
+                 acquire_timeout: Optional[float] = None, **client_options):
+        config = load_config()
+        self.max_size = max_size or config.get("pool_size", 8)
+        self.idle_timeout = idle_timeout or config.get("pool_idle_timeout", 60.0)
+        self.acquire_timeout = acquire_timeout or config.get("timeout", 5.0)
+        self.client_options = client_options
+        self._idle = deque()
+        self._created = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: Optional[float] = None) -> NetworkClient:
+        deadline = time.monotonic() + (timeout if timeout is not None else self.acquire_timeout)
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Pula połączeń została zamknięta")
+                self._evict_idle()
+                while self._idle:
+                    client, _ = self._idle.pop()
+                    if self._is_healthy(client):
+                        return client
+                    self._discard(client)
+                if self._created < self.max_size:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Brak wolnego połączenia w puli")
+                self._condition.wait(remaining)
+
+        client = NetworkClient(**self.client_options)
+        try:
+            self._connect(client)
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+        return client
+
+    def release(self, client: NetworkClient, broken: bool = False):
+        with self._condition:
+            if broken or self._closed or client.sock is None:
+                self._discard(client)
+            else:
+                self._idle.append((client, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        client = self.acquire(timeout)
+        try:
+            yield client
+        except Exception:
+            self.release(client, broken=True)
+            raise
+        self.release(client)
+
+    def send(self, data: dict) -> bool:
+        client = self.acquire()
+        try:
+            ok = client.send(data)
+        except Exception:
+            self.release(client, broken=True)
+            raise
+        self.release(client, broken=not ok)
+        return ok
+
+    def send_many(self, readings) -> int:
+        with self.connection() as client:
+            return client.send_many(readings)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                client, _ = self._idle.pop()
+                self._discard(client)
+            self._condition.notify_all()
+
+    @property
+    def size(self) -> int:
+        return self._created
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def _connect(self, client: NetworkClient):
+        for attempt in range(client.retries):
+            try:
+                client.connect()
+                return
+            except OSError:
+                if attempt == client.retries - 1:
+                    raise
+                time.sleep(backoff_delay(attempt, client.backoff_base, client.backoff_max))
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            client, _ = self._idle.popleft()
+            self._discard(client)
+
+    def _discard(self, client: NetworkClient):
+        try:
+            client.close()
+        except OSError:
+            pass
+        self._created -= 1
+
+    @staticmethod
+    def _is_healthy(client: NetworkClient) -> bool:
+        if client.sock is None:
+            return False
+        try:
+            client.sock.setblocking(False)
+            return client.sock.recv(1, socket.MSG_PEEK) != b""
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            return False
+        finally:
+            if client.sock.fileno() != -1:
+                client.sock.settimeout(client.timeout)
@@ -0,0 +1,130 @@
+import json
+from network.binary import BinaryDecoder
+
+ACK = b"ACK\n"
+HELLO = b"HELLO"
+
+
+class LineFramer:
+    def __init__(self, max_line: int = 1024 * 1024):
+        self.max_line = max_line
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> list:
+        self._buffer += chunk
+        lines = []
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", start)
+            if end == -1:
+                break
+            line = bytes(self._buffer[start:end]).strip()
+            if line:
+                lines.append(line)
+            start = end + 1
+        if start:
+            del self._buffer[:start]
+        if len(self._buffer) > self.max_line:
+            self._buffer.clear()
+            raise ValueError("Przekroczono maksymalną długość wiadomości")
+        return lines
+
+    def pending(self) -> bytes:
+        return bytes(self._buffer)
+
+
+def decode_message(line: bytes):
+    payload = json.loads(line)
+    seq = payload.pop("seq", None) if isinstance(payload, dict) else None
+    return seq, payload
+
+
+def encode_ack(seq=None, count=None) -> bytes:
+    if seq is None and count is None:
+        return ACK
+    fields = []
+    if seq is not None:
+        fields.append(f"seq={seq}")
+    if count is not None:
+        fields.append(f"count={count}")
+    return f"ACK {' '.join(fields)}\n".encode("ascii")
+
+
+def encode_error(seq, message: str) -> bytes:
+    return json.dumps({"seq": seq, "error": message}).encode("utf-8") + b"\n"
+
+
+def encode_batch(records: list, seq=None) -> bytes:
+    head = b'{"batch":[' if seq is None else b'{"seq":%d,"batch":[' % seq
+    return head + b",".join(records) + b"]}\n"
+
+
+def parse_ack(line: bytes) -> dict:
+    parts = line.split()
+    if not parts or parts[0] != b"ACK":
+        raise ValueError(f"Nieprawidłowe potwierdzenie: {line!r}")
+    fields = {}
+    for part in parts[1:]:
+        key, _, value = part.partition(b"=")
+        fields[key.decode("ascii")] = int(value)
+    return fields
+
+
+class MessageReader:
+    def __init__(self, allow_binary: bool = False, on_error=None):
+        self.allow_binary = allow_binary
+        self.on_error = on_error
+        self.wire_format = None
+        self._head = bytearray()
+        self._framer = LineFramer()
+        self._decoder = None
+
+    def feed(self, chunk: bytes):
+        reply = b""
+        if self.wire_format is None:
+            chunk, reply = self._negotiate(chunk)
+            if self.wire_format is None:
+                return [], reply
+
+        if self._decoder:
+            return self._decoder.feed(chunk), reply
+
+        messages = []
+        for line in self._framer.feed(chunk):
+            try:
+                messages.append(decode_message(line))
+            except json.JSONDecodeError as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(e)
+        return messages, reply
+
+    def _negotiate(self, chunk: bytes):
+        self._head += chunk
+        if not self._head:
+            return b"", b""
+        if not self._head.startswith(HELLO[:len(self._head)]):
+            self.wire_format = "json"
+            rest = bytes(self._head)
+            self._head.clear()
+            return rest, b""
+
+        end = self._head.find(b"\n")
+        if end == -1:
+            if len(self._head) > 64:
+                raise ValueError("Nieprawidłowe powitanie klienta")
+            return b"", b""
+        requested = bytes(self._head[:end]).split()[1:]
+        rest = bytes(self._head[end + 1:])
+        self._head.clear()
+
+        if self.allow_binary and b"binary" in requested:
+            self.wire_format = "binary"
+            self._decoder = BinaryDecoder()
+        else:
+            self.wire_format = "json"
+        return rest, encode_hello(self.wire_format)
+
+
+def encode_hello(wire_format: str) -> bytes:
+    return HELLO + b" " + wire_format.encode("ascii") + b"\n"
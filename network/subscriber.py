@@ -0,0 +1,67 @@
+import json
+import socket
+from collections import deque
+from typing import Iterable, Iterator, Optional
+from network.config import load_config
+from network.protocol import LineFramer, parse_ack
+
+
+class SubscriptionClient:
+    def __init__(self, sensor_ids: Optional[Iterable[str]] = None, interval: Optional[float] = None,
+                 host: Optional[str] = None, port: Optional[int] = None, timeout: Optional[float] = None):
+        config = load_config()
+        self.host = host or config["host"]
+        self.port = port or config["port"]
+        self.timeout = timeout or config.get("timeout", 5.0)
+        self.sensor_ids = list(sensor_ids) if sensor_ids is not None else None
+        self.interval = interval
+        self.sock = None
+        self._framer = LineFramer()
+        self._lines = deque()
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._framer = LineFramer()
+        self._lines.clear()
+        request = {"seq": 1, "subscribe": self.sensor_ids if self.sensor_ids is not None else "*"}
+        if self.interval is not None:
+            request["interval"] = self.interval
+        self.sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        line = self._next_line()
+        if line.startswith(b"{"):
+            raise ConnectionError(f"Serwer odrzucił subskrypcję: {json.loads(line).get('error')}")
+        ack = parse_ack(line)
+        if ack.get("seq") != 1:
+            raise ConnectionError(f"Nieoczekiwane potwierdzenie subskrypcji: {ack}")
+        self.sock.settimeout(None)
+
+    def updates(self) -> Iterator[list]:
+        while self.sock is not None:
+            try:
+                line = self._next_line()
+            except (ConnectionError, OSError):
+                if self.sock is None:
+                    return
+                raise
+            if line.startswith(b"ACK"):
+                continue
+            message = json.loads(line)
+            if "update" in message:
+                yield message["update"]
+
+    def close(self):
+        if self.sock:
+            sock, self.sock = self.sock, None
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _next_line(self) -> bytes:
+        while not self._lines:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("Serwer zamknął połączenie")
+            self._lines.extend(self._framer.feed(chunk))
+        return self._lines.popleft()
@@ -1,7 +1,9 @@
 import random
+import zlib
+from datetime import datetime
 
 class Sensor:
-    def __init__(self, sensor_id, name, unit, min_value, max_value, frequency=1):
+    def __init__(self, sensor_id, name, unit, min_value, max_value, frequency=1, seed=None):
         self.sensor_id = sensor_id
         self.name = name
         self.unit = unit
@@ -10,6 +12,16 @@ class Sensor:
         self.frequency = frequency
         self.active = True
         self.last_value = None
+        self.scheduler = None
+        self.seed = seed if seed is not None else zlib.crc32(str(sensor_id).encode("utf-8"))
+        self._rng = None
+
+    @property
+    def rng(self):
+        if self._rng is None:
+            import numpy as np
+            self._rng = np.random.default_rng(self.seed)
+        return self._rng
 
     def read_value(self):
         if not self.active:
@@ -18,6 +30,28 @@ class Sensor:
         self.last_value = value
         return value
 
+    def read_batch(self, n, timestamps=None):
+        import numpy as np
+
+        if not self.active:
+            raise Exception(f"Czujnik {self.name} jest wyłączony.")
+        if timestamps is None:
+            step = int(1_000_000 / self.frequency)
+            timestamps = np.datetime64(datetime.now(), "us") + np.arange(n, dtype=np.int64) * np.timedelta64(step, "us")
+        else:
+            timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+            if len(timestamps) != n:
+                raise ValueError("Liczba znaczników czasu nie zgadza się z n")
+
+        hours = timestamps.astype("datetime64[h]").astype(np.int64) % 24
+        values = self._batch_values(hours, self.rng)
+        if n:
+            self.last_value = float(values[-1])
+        return timestamps, values
+
+    def _batch_values(self, hours, rng):
+        return rng.uniform(self.min_value, self.max_value, len(hours))
+
     def calibrate(self, calibration_factor):
         if self.last_value is None:
             self.read_value()
@@ -31,9 +65,13 @@ class Sensor:
 
     def start(self):
         self.active = True
+        if self.scheduler is not None:
+            self.scheduler.add(self)
 
     def stop(self):
         self.active = False
+        if self.scheduler is not None:
+            self.scheduler.remove(self)
 
     def __str__(self):
         return f"Sensor(id={self.sensor_id}, name={self.name}, unit={self.unit})"
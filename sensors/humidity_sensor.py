@@ -3,7 +3,7 @@ import time
 from sensors.base_sensor import Sensor
 
 class HumiditySensor(Sensor):
-    def __init__(self, sensor_id, frequency=1):
+    def __init__(self, sensor_id, frequency=1, seed=None):
 
         super().__init__(
             sensor_id=sensor_id,
@@ -11,7 +11,8 @@ class HumiditySensor(Sensor):
             unit="%",
             min_value=0,
             max_value=100,
-            frequency=frequency
+            frequency=frequency,
+            seed=seed
         )
 
     def read_value(self):
@@ -32,3 +33,15 @@ class HumiditySensor(Sensor):
         final_value = max(self.min_value, min(self.max_value, raw_value))
         self.last_value = round(final_value, 2)
         return self.last_value
+
+    def _batch_values(self, hours, rng):
+        import numpy as np
+
+        transition = ((5 <= hours) & (hours < 9)) | ((18 <= hours) & (hours < 22))
+        day = (9 <= hours) & (hours < 18)
+        low = np.select([transition, day], [65, 35], 55)
+        high = np.select([transition, day], [85, 55], 75)
+        base_humidity = rng.uniform(low, high)
+
+        noise = rng.uniform(-4, 4, len(hours))
+        return np.round(np.clip(base_humidity + noise, self.min_value, self.max_value), 2)
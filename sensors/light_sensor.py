@@ -4,12 +4,12 @@ import math
 from sensors.base_sensor import Sensor
 
 class LightSensor(Sensor):
-    def __init__(self, sensor_id, frequency=1):
+    def __init__(self, sensor_id, frequency=1, seed=None):
         sensor_name = "Czujnik światła"
         sensor_unit = "lx"
         min_value = 0
         max_value = 10000
-        super().__init__(sensor_id, sensor_name, sensor_unit, min_value, max_value, frequency)
+        super().__init__(sensor_id, sensor_name, sensor_unit, min_value, max_value, frequency, seed)
 
     def read_value(self):
         if not self.active:
@@ -28,3 +28,13 @@ class LightSensor(Sensor):
 
         self.last_value = round(light_level, 2)
         return self.last_value
+
+    def _batch_values(self, hours, rng):
+        import numpy as np
+
+        day = (6 <= hours) & (hours <= 18)
+        night_light = rng.uniform(0, 20, len(hours))
+        base_light = np.where(day, 10000 * np.sin(np.pi * (hours - 6) / 12), night_light)
+
+        noise = rng.uniform(-100, 100, len(hours))
+        return np.round(np.clip(base_light + noise, self.min_value, self.max_value), 2)
@@ -3,14 +3,15 @@ import time
 from sensors.base_sensor import Sensor
 
 class PressureSensor(Sensor):
-    def __init__(self, sensor_id, frequency=1):
+    def __init__(self, sensor_id, frequency=1, seed=None):
         super().__init__(
             sensor_id=sensor_id,
             name="Czujnik ciśnienia atmosferycznego",
             unit="hPa",
             min_value=950,
             max_value=1050,
-            frequency=frequency
+            frequency=frequency,
+            seed=seed
         )
 
     def read_value(self):
@@ -30,3 +31,12 @@ class PressureSensor(Sensor):
         self.last_value = round(pressure, 2)
 
         return self.last_value
+
+    def _batch_values(self, hours, rng):
+        import numpy as np
+
+        day = (6 <= hours) & (hours < 18)
+        base_pressure = rng.uniform(np.where(day, 1000, 980), np.where(day, 1020, 1005))
+
+        fluctuation = rng.uniform(-5, 5, len(hours))
+        return np.round(np.clip(base_pressure + fluctuation, self.min_value, self.max_value), 2)
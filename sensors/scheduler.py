@@ -0,0 +1,149 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+
+
+class _Entry:
+    __slots__ = ("sensor", "period", "removed", "busy", "reads", "missed", "errors",
+                 "jitter_total", "jitter_max", "last_duration")
+
+    def __init__(self, sensor):
+        if sensor.frequency <= 0:
+            raise ValueError(f"Nieprawidłowa częstotliwość czujnika {sensor.sensor_id}: {sensor.frequency}")
+        self.sensor = sensor
+        self.period = 1.0 / sensor.frequency
+        self.removed = False
+        self.busy = False
+        self.reads = 0
+        self.missed = 0
+        self.errors = 0
+        self.jitter_total = 0.0
+        self.jitter_max = 0.0
+        self.last_duration = 0.0
+
+
+class SensorScheduler:
+    def __init__(self, on_reading, workers: int = 4):
+        self.on_reading = on_reading
+        self.workers = workers
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._running = False
+
+    def register(self, sensor):
+        sensor.scheduler = self
+        if sensor.active:
+            self.add(sensor)
+
+    def add(self, sensor):
+        with self._cond:
+            entry = self._entries.get(sensor.sensor_id)
+            if entry is not None and not entry.removed:
+                return
+            new_entry = _Entry(sensor)
+            if entry is not None:
+                new_entry.reads, new_entry.missed, new_entry.errors = entry.reads, entry.missed, entry.errors
+                new_entry.jitter_total, new_entry.jitter_max = entry.jitter_total, entry.jitter_max
+            self._entries[sensor.sensor_id] = new_entry
+            heapq.heappush(self._heap, (time.monotonic(), next(self._counter), new_entry))
+            self._cond.notify()
+
+    def remove(self, sensor):
+        with self._cond:
+            entry = self._entries.get(sensor.sensor_id)
+            if entry is not None:
+                entry.removed = True
+            self._cond.notify()
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            now = time.monotonic()
+            self._heap = [(now, next(self._counter), entry) for entry in self._entries.values() if not entry.removed]
+            heapq.heapify(self._heap)
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sensor-read")
+        self._thread = threading.Thread(target=self._run, name="sensor-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def metrics(self) -> dict:
+        with self._cond:
+            entries = list(self._entries.values())
+        return {
+            entry.sensor.sensor_id: {
+                "scheduled": not entry.removed,
+                "frequency": entry.sensor.frequency,
+                "reads": entry.reads,
+                "missed": entry.missed,
+                "errors": entry.errors,
+                "avg_jitter_ms": entry.jitter_total / entry.reads * 1000 if entry.reads else 0.0,
+                "max_jitter_ms": entry.jitter_max * 1000,
+                "last_duration_ms": entry.last_duration * 1000,
+            }
+            for entry in entries
+        }
+
+    def _run(self):
+        with self._cond:
+            while self._running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, entry = self._heap[0]
+                if entry.removed:
+                    heapq.heappop(self._heap)
+                    continue
+                now = time.monotonic()
+                if due > now:
+                    self._cond.wait(due - now)
+                    continue
+
+                heapq.heappop(self._heap)
+                if entry.busy:
+                    entry.missed += 1
+                else:
+                    entry.busy = True
+                    self._executor.submit(self._read, entry, due)
+
+                next_due = due + entry.period
+                if next_due <= now:
+                    skipped = int((now - due) / entry.period)
+                    entry.missed += skipped
+                    next_due = due + (skipped + 1) * entry.period
+                heapq.heappush(self._heap, (next_due, next(self._counter), entry))
+
+    def _read(self, entry, due):
+        started = time.monotonic()
+        jitter = started - due
+        try:
+            timestamp = datetime.now()
+            value = entry.sensor.read_value()
+            self.on_reading(entry.sensor, timestamp, value)
+            entry.reads += 1
+            entry.jitter_total += jitter
+            entry.jitter_max = max(entry.jitter_max, jitter)
+        except Exception as e:
+            entry.errors += 1
+            print(f"[HARMONOGRAM] Błąd odczytu {entry.sensor.sensor_id}: {e}")
+        finally:
+            entry.last_duration = time.monotonic() - started
+            entry.busy = False
@@ -4,14 +4,15 @@ import time
 import random
 
 class TemperatureSensor(Sensor):
-    def __init__(self, sensor_id, frequency=1):
+    def __init__(self, sensor_id, frequency=1, seed=None):
         super().__init__(
             sensor_id=sensor_id,
             name="Symulowany Czujnik Temperatury",
             unit="°C",
             min_value=-20.0,
             max_value=50.0,
-            frequency=frequency
+            frequency=frequency,
+            seed=seed
         )
 
     def read_value(self):
@@ -29,3 +30,10 @@ class TemperatureSensor(Sensor):
             max(self.min_value, min(self.max_value, simulated_value)), 2
         )
         return self.last_value
+
+    def _batch_values(self, hours, rng):
+        import numpy as np
+
+        base_temp = 20 + 8 * np.sin((2 * np.pi * hours) / 24)
+        fluctuation = rng.uniform(-1.5, 1.5, len(hours))
+        return np.round(np.clip(base_temp + fluctuation, self.min_value, self.max_value), 2)
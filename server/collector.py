@@ -0,0 +1,228 @@
+import json
+import signal
+import socket
+import socketserver
+import threading
+from datetime import datetime, timedelta
+
+from logger import Logger
+from metrics import REGISTRY, start_exporter
+from network.config import load_config
+from server.ingest import IngestPipeline
+from server.server import NetworkServer
+from storage.rolling import RollingStats
+
+AVERAGE_WINDOWS = (timedelta(hours=1), timedelta(hours=12))
+
+
+class Collector:
+    def __init__(self, logger_config: str = "config.json", port: int = None, query_port: int = None, worker: int = None):
+        config = load_config()
+        self.config = config
+        self.worker = worker
+        self.query_host = config.get("collector_query_host", "127.0.0.1")
+        self.query_port = query_port if query_port is not None else config.get("collector_query_port", 5001)
+        if worker is not None:
+            self.query_port += worker
+        self.logger = Logger(logger_config, worker=worker)
+        self.server = NetworkServer(port=port, on_message=self._on_message, reuse_port=True if worker is not None else None)
+        self.ingest = IngestPipeline(
+            self._apply_readings,
+            shards=config.get("ingest_shards", 8),
+            queue_size=config.get("ingest_queue_size", 100000),
+            max_batch=config.get("ingest_max_batch", 1000)
+        )
+        self.lock = threading.Lock()
+        self.latest = {}
+        self.history = {}
+        self.started_at = None
+        self._query_server = None
+        self._exporter = None
+        REGISTRY.gauge("ingest_queue_depth", lambda: self.ingest.queue_depth)
+
+    def run(self):
+        self.started_at = datetime.now()
+        self.logger.start()
+        self.ingest.start()
+        self._start_query_server()
+        self._exporter = start_exporter(self.config, worker=self.worker)
+        try:
+            self.server.start()
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        self.server.stop()
+
+    def shutdown(self):
+        self.server.stop()
+        if self._query_server is not None:
+            self._query_server.shutdown()
+            self._query_server.server_close()
+            self._query_server = None
+        self.ingest.stop()
+        self.logger.stop()
+        if self._exporter is not None:
+            self._exporter.stop()
+            self._exporter = None
+        print(f"[KOLEKTOR{self._label()}] Zatrzymano, bufory zapisane.")
+
+    def stats(self) -> dict:
+        return {
+            "worker": self.worker,
+            "uptime_s": (datetime.now() - self.started_at).total_seconds() if self.started_at else 0.0,
+            "connections": self.server.connections,
+            "messages": self.server.messages,
+            "subscriptions": self.server.subscriptions.stats(),
+            "sensors": len(self.latest),
+            "ingest": self.ingest.stats(),
+            "logger": {"queue_depth": self.logger.queue_depth, "dropped": self.logger.dropped},
+        }
+
+    def latest_readings(self) -> dict:
+        now = datetime.now()
+        result = {}
+        with self.lock:
+            for sensor_id, (value, unit, timestamp) in self.latest.items():
+                history = self.history[sensor_id]
+                history.expire(now)
+                result[sensor_id] = {
+                    "value": value,
+                    "unit": unit,
+                    "timestamp": timestamp.isoformat(),
+                    "avg_1h": history.mean(AVERAGE_WINDOWS[0]),
+                    "avg_12h": history.mean(AVERAGE_WINDOWS[1]),
+                }
+        return result
+
+    def _on_message(self, payload):
+        timestamp = datetime.fromisoformat(payload["timestamp"])
+        self.ingest.submit([(payload["sensor"], timestamp, payload["value"], payload["unit"])])
+
+    def _apply_readings(self, readings):
+        with self.lock:
+            for sensor_id, timestamp, value, unit in readings:
+                self.latest[sensor_id] = (value, unit, timestamp)
+                history = self.history.get(sensor_id)
+                if history is None:
+                    history = self.history[sensor_id] = RollingStats(AVERAGE_WINDOWS)
+                history.add(timestamp, value)
+        for sensor_id, timestamp, value, unit in readings:
+            self.logger.log_reading(sensor_id, timestamp, value, unit)
+
+    def _start_query_server(self):
+        collector = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    command = line.decode("utf-8").strip()
+                    if not command:
+                        continue
+                    try:
+                        for response in collector._handle_query(command):
+                            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                    except Exception as e:
+                        self.wfile.write(json.dumps({"error": str(e)}).encode("utf-8") + b"\n")
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._query_server = socketserver.ThreadingTCPServer((self.query_host, self.query_port), Handler)
+        self._query_server.daemon_threads = True
+        threading.Thread(target=self._query_server.serve_forever, daemon=True).start()
+        print(f"[KOLEKTOR{self._label()}] Zapytania na {self.query_host}:{self._query_server.server_address[1]}")
+
+    def _label(self) -> str:
+        return "" if self.worker is None else f" w{self.worker}"
+
+    def _handle_query(self, command):
+        name, _, args = command.partition(" ")
+        name = name.upper()
+        if name == "STATS":
+            yield self.stats()
+        elif name == "LATEST":
+            yield self.latest_readings()
+        elif name == "METRICS":
+            yield REGISTRY.snapshot()
+        elif name == "READ":
+            args = args.split()
+            if len(args) not in (2, 3):
+                raise ValueError("Użycie: READ <start> <end> [sensor_id]")
+            start, end = datetime.fromisoformat(args[0]), datetime.fromisoformat(args[1])
+            for row in self.logger.read_logs(start, end, args[2] if len(args) == 3 else None):
+                row["timestamp"] = row["timestamp"].isoformat()
+                yield row
+            yield {"end": True}
+        else:
+            raise ValueError(f"Nieznane polecenie: {name}")
+
+
+def query_collector(command: str, host: str = None, port: int = None, timeout: float = 5.0):
+    config = load_config()
+    host = host or config.get("collector_query_host", "127.0.0.1")
+    port = port or config.get("collector_query_port", 5001)
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(command.encode("utf-8") + b"\n")
+        reader = sock.makefile("rb")
+        streaming = command.split(" ", 1)[0].upper() == "READ"
+        rows = []
+        for line in reader:
+            response = json.loads(line)
+            if "error" in response:
+                raise RuntimeError(response["error"])
+            if not streaming:
+                return response
+            if response.get("end"):
+                return rows
+            rows.append(response)
+        raise ConnectionError("Kolektor zamknął połączenie")
+
+
+def run_collector(logger_config: str = "config.json", port: int = None, query_port: int = None, worker: int = None):
+    collector = Collector(logger_config, port=port, query_port=query_port, worker=worker)
+
+    def on_signal(signum, frame):
+        print(f"[KOLEKTOR{collector._label()}] Otrzymano sygnał {signum}, zamykanie...")
+        collector.stop()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    collector.run()
+
+
+def run_workers(workers: int, logger_config: str = "config.json", port: int = None, query_port: int = None):
+    import multiprocessing
+    processes = [
+        multiprocessing.Process(target=run_collector, args=(logger_config, port, query_port, worker), name=f"collector-w{worker}")
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def on_signal(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for process in processes:
+        process.join()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Kolektor odczytów czujników bez GUI")
+    parser.add_argument("--config", default="config.json", help="konfiguracja Loggera")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--query-port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=load_config().get("collector_workers", 1))
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_workers(args.workers, args.config, port=args.port, query_port=args.query_port)
+    else:
+        run_collector(args.config, port=args.port, query_port=args.query_port)
+
+
+if __name__ == "__main__":
+    main()
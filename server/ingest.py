@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+
+
+class IngestPipeline:
+    def __init__(self, apply_batch, shards: int = 8, queue_size: int = 100000, max_batch: int = 1000):
+        self.apply_batch = apply_batch
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self._shards = [deque() for _ in range(max(1, shards))]
+        self._wakeup = threading.Event()
+        self._drained = threading.Event()
+        self._depth_lock = threading.Lock()
+        self._depth = 0
+        self._consumer = None
+        self._running = False
+        self.readings = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self._latency_total = 0.0
+        self.max_latency = 0.0
+
+    def start(self):
+        if self._consumer is not None:
+            return
+        self._running = True
+        self._consumer = threading.Thread(target=self._run, name="ingest-consumer", daemon=True)
+        self._consumer.start()
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._consumer is not None:
+            self._consumer.join()
+            self._consumer = None
+        entries = self._collect()
+        while entries:
+            self._apply(entries)
+            entries = self._collect()
+
+    def submit(self, readings: list):
+        if not readings:
+            return
+        while self._running and self.queue_depth >= self.queue_size:
+            self._drained.clear()
+            self._wakeup.set()
+            self._drained.wait(0.1)
+        if not self._running:
+            raise RuntimeError("Potok odczytów został zatrzymany")
+        with self._depth_lock:
+            self._depth += len(readings)
+        shard = self._shards[threading.get_native_id() % len(self._shards)]
+        shard.append((time.perf_counter(), readings))
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._depth
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "readings": self.readings,
+            "batches": self.batches,
+            "errors": self.errors,
+            "last_batch_size": self.last_batch_size,
+            "avg_batch_size": self.readings / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "avg_latency_ms": self._latency_total / self.readings * 1000 if self.readings else 0.0,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            entries = self._collect()
+            if entries:
+                self._apply(entries)
+                continue
+            self._drained.set()
+            if not self._running:
+                return
+            self._wakeup.wait(0.5)
+
+    def _collect(self) -> list:
+        entries = []
+        count = 0
+        while count < self.max_batch:
+            taken = False
+            for shard in self._shards:
+                try:
+                    entry = shard.popleft()
+                except IndexError:
+                    continue
+                entries.append(entry)
+                count += len(entry[1])
+                taken = True
+            if not taken:
+                break
+        return entries
+
+    def _apply(self, entries):
+        batch = [reading for _, readings in entries for reading in readings]
+        with self._depth_lock:
+            self._depth -= len(batch)
+        try:
+            self.apply_batch(batch)
+        except Exception as e:
+            self.errors += len(batch)
+            print(f"[INGEST] Błąd podczas zapisu paczki: {e}")
+        now = time.perf_counter()
+        for enqueued, readings in entries:
+            latency = now - enqueued
+            self._latency_total += latency * len(readings)
+            self.max_latency = max(self.max_latency, latency)
+        self.readings += len(batch)
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self._drained.set()
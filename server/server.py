@@ -1,50 +1,333 @@
+import math
 import socket
+import selectors
 import threading
-import json
+import time
+from metrics import REGISTRY
 from network.config import load_config
+from network.protocol import MessageReader, encode_ack, encode_error
+from server.subscriptions import SubscriptionHub
+
+ACCEPTS = REGISTRY.counter("server_accepts_total")
+BYTES_IN = REGISTRY.counter("server_bytes_in_total")
+BYTES_OUT = REGISTRY.counter("server_bytes_out_total")
+DECODE_MS = REGISTRY.histogram("server_decode_ms")
+DECODE_ERRORS = REGISTRY.counter("server_decode_errors_total")
+DISPATCH_ERRORS = REGISTRY.counter("server_dispatch_errors_total")
+HANDLER_JOIN_TIMEOUT = 5.0
 
 class NetworkServer:
-    def __init__(self, port: int = None):
+    def __init__(self, port: int = None, mode: str = None, on_message=None, reuse_port: bool = None):
         config = load_config()
         self.port = port or config.get("port", 5000)
         self.host = config.get("host", "0.0.0.0")
+        self.mode = mode or config.get("server_mode", "threaded")
+        self.backlog = config.get("backlog", 1024)
+        self.allow_binary = config.get("wire_format", "json") == "binary"
+        self.reuse_port = reuse_port if reuse_port is not None else config.get("reuse_port", False)
+        self.on_message = on_message or self._print_payload
+        self.running = False
+        self.ready = threading.Event()
+        self.connections = 0
+        self.messages = 0
+        self._handlers = {}
+        self._handlers_lock = threading.Lock()
+        self.subscriptions = SubscriptionHub(
+            default_interval=config.get("subscribe_interval_s", 1.0),
+            min_interval=config.get("subscribe_min_interval_s", 0.05),
+            max_buffer=config.get("subscriber_buffer_bytes", 256 * 1024)
+        )
+        REGISTRY.gauge("server_connections", lambda: self.connections)
+        REGISTRY.gauge("server_messages", lambda: self.messages)
 
 
 
     def start(self):
+        self.subscriptions.start()
+        try:
+            if self.mode == "event_loop":
+                self._start_event_loop()
+            else:
+                self._start_threaded()
+        finally:
+            self.subscriptions.stop()
+
+    def stop(self):
+        self.running = False
+
+
+
+    def _start_threaded(self):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_sock:
-            server_sock.bind((self.host, self.port))
-            server_sock.listen()
+            self._bind(server_sock)
+            server_sock.listen(self.backlog)
+            server_sock.settimeout(1.0)
             print(f"[SERWER] Nasłuchiwanie na {self.host}:{self.port}")
+            self.running = True
+            self.ready.set()
 
 
 
-            while True:
-                client_socket, addr = server_sock.accept()
+            while self.running:
+                try:
+                    client_socket, addr = server_sock.accept()
+                except socket.timeout:
+                    continue
+                client_socket.settimeout(None)
+                ACCEPTS.inc()
                 print(f"[SERWER] Połączenie od klienta: {addr}")
-                threading.Thread(target=self._handle_client, args=(client_socket,), daemon=True).start()
+                handler = threading.Thread(target=self._handle_client, args=(client_socket,), daemon=True)
+                with self._handlers_lock:
+                    self._handlers[handler] = client_socket
+                handler.start()
+            self._join_handlers()
+
+    def _join_handlers(self):
+        with self._handlers_lock:
+            handlers = list(self._handlers.items())
+        for _, client_socket in handlers:
+            try:
+                client_socket.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        deadline = time.monotonic() + HANDLER_JOIN_TIMEOUT
+        for handler, _ in handlers:
+            handler.join(max(0.0, deadline - time.monotonic()))
+            if handler.is_alive():
+                print(f"[SERWER] Wątek obsługi klienta nie zakończył się w ciągu {HANDLER_JOIN_TIMEOUT} s")
+
+
+
+    def _bind(self, server_sock):
+        server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            if not hasattr(socket, "SO_REUSEPORT"):
+                raise OSError("SO_REUSEPORT nie jest dostępne na tej platformie")
+            server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server_sock.bind((self.host, self.port))
 
 
 
     def _handle_client(self, client_socket):
+        with self._handlers_lock:
+            self.connections += 1
         with client_socket:
+            conn = _Connection(None, self._new_reader(), client_socket)
             try:
-                data_chunks = []
-                while True:
-                    chunk = client_socket.recv(1024)
+                while self.running:
+                    chunk = client_socket.recv(65536)
                     if not chunk:
                         break
-                    data_chunks.append(chunk)
-                    if b"\n" in chunk:
-                        break
-                data = b"".join(data_chunks)
-                decoded = data.decode("utf-8").strip()
-                payload = json.loads(decoded)
-                print("[SERWER] Odebrano dane:")
-                for k, v in payload.items():
-                    print(f"  {k}: {v}")
-                client_socket.sendall(b"ACK\n")
-            except json.JSONDecodeError as e:
-                print(f"[SERWER] Błąd dekodowania JSON: {e}")
+                    BYTES_IN.inc(len(chunk))
+                    messages, acks = self._decode(conn.reader, chunk)
+                    acks = bytearray(acks)
+                    for seq, payload in messages:
+                        acks += self._handle_message(seq, payload, conn)
+                    if acks and conn.subscriber is not None:
+                        conn.subscriber.write(bytes(acks))
+                    elif acks:
+                        client_socket.sendall(acks)
+                        BYTES_OUT.inc(len(acks))
+            except (ValueError, KeyError) as e:
+                DECODE_ERRORS.inc()
+                print(f"[SERWER] Błąd dekodowania wiadomości: {e}")
             except Exception as e:
                 print(f"[SERWER] Błąd podczas obsługi klienta: {e}")
+            finally:
+                if conn.subscriber is not None:
+                    self.subscriptions.unsubscribe(conn.subscriber)
+                with self._handlers_lock:
+                    self.connections -= 1
+                    self._handlers.pop(threading.current_thread(), None)
+
+    def _new_reader(self):
+        return MessageReader(self.allow_binary, on_error=self._report_decode_error)
+
+    def _decode(self, reader, chunk):
+        started = time.perf_counter()
+        try:
+            return reader.feed(chunk)
+        finally:
+            DECODE_MS.observe((time.perf_counter() - started) * 1000)
+
+    def _report_decode_error(self, error):
+        DECODE_ERRORS.inc()
+        print(f"[SERWER] Błąd dekodowania JSON: {error}")
+
+    def _handle_message(self, seq, payload, conn):
+        if not isinstance(payload, dict):
+            raise ValueError(f"Nieprawidłowa wiadomość: oczekiwano obiektu JSON, otrzymano {payload!r}")
+        if "subscribe" in payload or "unsubscribe" in payload:
+            return self._handle_subscription(seq, payload, conn)
+        if "batch" in payload:
+            if not isinstance(payload["batch"], list):
+                raise ValueError("Nieprawidłowa wiadomość: pole 'batch' musi być listą")
+            accepted = 0
+            for reading in payload["batch"]:
+                accepted += self._dispatch(reading)
+            return encode_ack(seq, accepted)
+        self._dispatch(payload)
+        return encode_ack(seq)
+
+    def _handle_subscription(self, seq, payload, conn):
+        if "subscribe" in payload:
+            try:
+                sensor_ids, interval = self._subscription_request(payload)
+            except ValueError as e:
+                DECODE_ERRORS.inc()
+                return encode_error(seq, str(e))
+        if conn.subscriber is not None:
+            self.subscriptions.unsubscribe(conn.subscriber)
+            conn.subscriber = None
+        if "subscribe" in payload:
+            conn.subscriber = self.subscriptions.subscribe(conn.sock, sensor_ids, interval)
+        return encode_ack(seq)
+
+    def _subscription_request(self, payload):
+        sensor_ids = payload["subscribe"]
+        if sensor_ids == "*":
+            sensor_ids = None
+        elif isinstance(sensor_ids, str) and sensor_ids:
+            sensor_ids = [sensor_ids]
+        elif not isinstance(sensor_ids, list) or not sensor_ids:
+            raise ValueError("Pole 'subscribe' musi zawierać '*' lub niepustą listę czujników")
+        elif not all(isinstance(sensor_id, str) and sensor_id for sensor_id in sensor_ids):
+            raise ValueError("Identyfikatory czujników w 'subscribe' muszą być niepustymi napisami")
+
+        interval = payload.get("interval")
+        if interval is not None:
+            if isinstance(interval, bool) or not isinstance(interval, (int, float)):
+                raise ValueError(f"Nieprawidłowy okres subskrypcji: {interval!r}")
+            if not math.isfinite(interval) or interval <= 0:
+                raise ValueError(f"Okres subskrypcji musi być dodatnią liczbą: {interval!r}")
+        return sensor_ids, interval
+
+    def _dispatch(self, payload) -> bool:
+        self.messages += 1
+        try:
+            self.on_message(payload)
+        except Exception as e:
+            DISPATCH_ERRORS.inc()
+            print(f"[SERWER] Błąd podczas obsługi wiadomości: {e}")
+            return False
+        if self.subscriptions:
+            try:
+                self.subscriptions.publish(payload)
+            except Exception as e:
+                print(f"[SERWER] Błąd podczas publikowania odczytu: {e}")
+        return True
+
+
+
+    def _start_event_loop(self):
+        selector = selectors.DefaultSelector()
+        server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            self._bind(server_sock)
+            server_sock.listen(self.backlog)
+            server_sock.setblocking(False)
+            selector.register(server_sock, selectors.EVENT_READ, None)
+            print(f"[SERWER] Nasłuchiwanie (event loop) na {self.host}:{self.port}")
+            self.running = True
+            self.ready.set()
+
+            while self.running:
+                for key, mask in selector.select(timeout=1.0):
+                    if key.data is None:
+                        self._accept(selector, key.fileobj)
+                    else:
+                        self._service(selector, key, mask)
+        finally:
+            for key in list(selector.get_map().values()):
+                if key.data is not None:
+                    if key.data.subscriber is not None:
+                        self.subscriptions.unsubscribe(key.data.subscriber)
+                    key.fileobj.close()
+            selector.close()
+            server_sock.close()
+
+    def _accept(self, selector, server_sock):
+        while True:
+            try:
+                client_socket, addr = server_sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            client_socket.setblocking(False)
+            ACCEPTS.inc()
+            self.connections += 1
+            selector.register(client_socket, selectors.EVENT_READ, _Connection(addr, self._new_reader(), client_socket))
+
+    def _service(self, selector, key, mask):
+        client_socket = key.fileobj
+        conn = key.data
+
+        if mask & selectors.EVENT_READ:
+            try:
+                chunk = client_socket.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                chunk = None
+            except OSError:
+                chunk = b""
+            if chunk == b"":
+                self._close(selector, client_socket)
+                return
+            if chunk:
+                BYTES_IN.inc(len(chunk))
+                try:
+                    messages, reply = self._decode(conn.reader, chunk)
+                    conn.outbox += reply
+                    for seq, payload in messages:
+                        conn.outbox += self._handle_message(seq, payload, conn)
+                except (ValueError, KeyError) as e:
+                    DECODE_ERRORS.inc()
+                    print(f"[SERWER] {conn.addr}: {e}")
+                    self._close(selector, client_socket)
+                    return
+                except Exception as e:
+                    print(f"[SERWER] Błąd podczas obsługi klienta {conn.addr}: {e}")
+                    self._close(selector, client_socket)
+                    return
+                if conn.subscriber is not None and conn.outbox:
+                    conn.subscriber.write(bytes(conn.outbox))
+                    conn.outbox.clear()
+
+        if conn.outbox:
+            try:
+                sent = client_socket.send(conn.outbox)
+                del conn.outbox[:sent]
+                BYTES_OUT.inc(sent)
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                self._close(selector, client_socket)
+                return
+
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if conn.outbox else 0)
+        if events != key.events:
+            selector.modify(client_socket, events, conn)
+
+    def _close(self, selector, client_socket):
+        conn = selector.get_key(client_socket).data
+        if conn.subscriber is not None:
+            self.subscriptions.unsubscribe(conn.subscriber)
+        selector.unregister(client_socket)
+        client_socket.close()
+        self.connections -= 1
+
+
+
+    def _print_payload(self, payload):
+        print("[SERWER] Odebrano dane:")
+        for k, v in payload.items():
+            print(f"  {k}: {v}")
+
+
+class _Connection:
+    __slots__ = ("addr", "reader", "outbox", "sock", "subscriber")
+
+    def __init__(self, addr, reader, sock=None):
+        self.addr = addr
+        self.reader = reader
+        self.outbox = bytearray()
+        self.sock = sock
+        self.subscriber = None
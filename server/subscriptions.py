@@ -0,0 +1,196 @@
+import json
+import socket
+import threading
+import time
+from typing import Iterable, Optional
+
+from metrics import REGISTRY
+
+PUSHES = REGISTRY.counter("subscribe_pushes_total")
+PUSHED_READINGS = REGISTRY.counter("subscribe_readings_total")
+OVERFLOWS = REGISTRY.counter("subscribe_overflows_total")
+PUSH_BYTES = REGISTRY.counter("subscribe_bytes_out_total")
+
+SEND_FLAGS = getattr(socket, "MSG_DONTWAIT", 0)
+
+
+class Subscriber:
+    __slots__ = ("sock", "sensor_ids", "interval", "max_buffer", "pending", "outbox", "next_due",
+                 "closed", "overflows", "pushed", "_lock")
+
+    def __init__(self, sock, sensor_ids: Optional[frozenset], interval: float, max_buffer: int):
+        self.sock = sock
+        self.sensor_ids = sensor_ids
+        self.interval = interval
+        self.max_buffer = max_buffer
+        self.pending = {}
+        self.outbox = bytearray()
+        self.next_due = time.monotonic() + interval
+        self.closed = False
+        self.overflows = 0
+        self.pushed = 0
+        self._lock = threading.Lock()
+
+    def write(self, data: bytes):
+        with self._lock:
+            self.outbox += data
+            self._send()
+
+    def _send(self):
+        if not self.outbox or self.closed:
+            return
+        try:
+            sent = self.sock.send(self.outbox, SEND_FLAGS)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self.closed = True
+            self.outbox.clear()
+            return
+        del self.outbox[:sent]
+        PUSH_BYTES.inc(sent)
+
+    def flush(self, now: float, pending: dict) -> bool:
+        self.next_due = now + self.interval
+        with self._lock:
+            self._send()
+            if not pending or self.closed:
+                return True
+            if len(self.outbox) >= self.max_buffer:
+                self.overflows += 1
+                OVERFLOWS.inc()
+                return False
+            readings = list(pending.values())
+            self.outbox += json.dumps({"update": readings}).encode("utf-8") + b"\n"
+            self.pushed += len(readings)
+            PUSHES.inc()
+            PUSHED_READINGS.inc(len(readings))
+            self._send()
+        return True
+
+
+class SubscriptionHub:
+    def __init__(self, default_interval: float = 1.0, min_interval: float = 0.05, max_buffer: int = 256 * 1024):
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_buffer = max_buffer
+        self._subscribers = []
+        self._by_sensor = {}
+        self._wildcard = []
+        self._cond = threading.Condition()
+        self._publish_lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        REGISTRY.gauge("subscribers", lambda: len(self._subscribers))
+
+    def __bool__(self):
+        return bool(self._subscribers)
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="subscription-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def subscribe(self, sock, sensor_ids: Optional[Iterable[str]] = None, interval: Optional[float] = None) -> Subscriber:
+        interval = self.default_interval if interval is None else max(float(interval), self.min_interval)
+        sensor_ids = frozenset(sensor_ids) if sensor_ids else None
+        subscriber = Subscriber(sock, sensor_ids, interval, self.max_buffer)
+        with self._cond:
+            self._subscribers.append(subscriber)
+            if sensor_ids is None:
+                self._wildcard.append(subscriber)
+            else:
+                for sensor_id in sensor_ids:
+                    self._by_sensor.setdefault(sensor_id, []).append(subscriber)
+            self._cond.notify()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscriber.closed = True
+        with self._cond:
+            self._remove(subscriber)
+
+    def publish(self, payload: dict):
+        sensor_id = payload.get("sensor") if isinstance(payload, dict) else None
+        if sensor_id is None:
+            return
+        targets = self._by_sensor.get(sensor_id)
+        wildcard = self._wildcard
+        if not targets and not wildcard:
+            return
+        with self._publish_lock:
+            if targets:
+                for subscriber in targets:
+                    subscriber.pending[sensor_id] = payload
+            for subscriber in wildcard:
+                subscriber.pending[sensor_id] = payload
+
+    def stats(self) -> dict:
+        with self._cond:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "pending": sum(len(subscriber.pending) for subscriber in subscribers),
+            "buffered_bytes": sum(len(subscriber.outbox) for subscriber in subscribers),
+            "overflows": sum(subscriber.overflows for subscriber in subscribers),
+        }
+
+    def _remove(self, subscriber):
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+        if subscriber.sensor_ids is None:
+            if subscriber in self._wildcard:
+                self._wildcard = [other for other in self._wildcard if other is not subscriber]
+            return
+        for sensor_id in subscriber.sensor_ids:
+            subscribers = self._by_sensor.get(sensor_id)
+            if subscribers is None:
+                continue
+            remaining = [other for other in subscribers if other is not subscriber]
+            if remaining:
+                self._by_sensor[sensor_id] = remaining
+            else:
+                del self._by_sensor[sensor_id]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                subscribers = list(self._subscribers)
+                if not subscribers:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                wake = min(subscriber.next_due for subscriber in subscribers)
+                if wake > now:
+                    self._cond.wait(wake - now)
+                    continue
+
+            due = [subscriber for subscriber in subscribers if subscriber.next_due <= now]
+            with self._publish_lock:
+                batches = []
+                for subscriber in due:
+                    batches.append(subscriber.pending)
+                    subscriber.pending = {}
+            for subscriber, pending in zip(due, batches):
+                if not subscriber.flush(now, pending):
+                    with self._publish_lock:
+                        pending.update(subscriber.pending)
+                        subscriber.pending = pending
+            closed = [subscriber for subscriber in subscribers if subscriber.closed]
+            if closed:
+                with self._cond:
+                    for subscriber in closed:
+                        self._remove(subscriber)
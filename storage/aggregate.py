@@ -0,0 +1,158 @@
+import re
+from itertools import islice
+
+import numpy as np
+
+from storage.columnar import from_epoch_us, to_epoch_us
+from storage.rollup import parse_bucket
+
+BASE_STATS = ("count", "sum", "min", "max", "mean")
+
+
+def parse_stats(stats) -> tuple:
+    percentiles = []
+    for name in stats:
+        if name in BASE_STATS:
+            continue
+        match = re.fullmatch(r"p(\d{1,2}(?:\.\d+)?|100)", name)
+        if not match:
+            raise ValueError(f"Nieznana statystyka: {name}")
+        percentiles.append(float(match.group(1)))
+    return tuple(stats), percentiles
+
+
+def iter_chunks(rows, size: int):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Aggregator:
+    def __init__(self, start, end, bucket, stats, chunk_rows: int = 100000):
+        self.start_us = to_epoch_us(start)
+        self.end_us = to_epoch_us(end)
+        self.bucket_us = parse_bucket(bucket)
+        self.stats, self.percentiles = parse_stats(stats)
+        self.chunk_rows = chunk_rows
+        self._groups = {}
+        self._pending = []
+        self._pending_rows = 0
+        self._window = None
+
+    def set_window(self, start_us: int, end_us: int):
+        self._window = (start_us, end_us)
+
+    def add_rows(self, rows: list, sensor_ids=None):
+        rows = [row for row in rows if row and row[0] != 'timestamp']
+        if not rows:
+            return
+        timestamps, sensors, values, _ = zip(*rows)
+        timestamps = np.array(timestamps, dtype="datetime64[us]").astype(np.int64)
+        sensors = np.array(sensors)
+        values = np.array(values, dtype=np.float64)
+
+        mask = (timestamps >= self.start_us) & (timestamps <= self.end_us)
+        if self._window is not None:
+            mask &= (timestamps >= self._window[0]) & (timestamps < self._window[1])
+        if sensor_ids is not None:
+            mask &= np.isin(sensors, list(sensor_ids))
+        if not mask.all():
+            timestamps, sensors, values = timestamps[mask], sensors[mask], values[mask]
+        if not len(values):
+            return
+
+        labels, codes = np.unique(sensors, return_inverse=True)
+        self._add(labels, codes, timestamps, values)
+
+    def add_columns(self, sensor_id: str, timestamps, values):
+        timestamps = np.frombuffer(timestamps, dtype=np.int64)
+        values = np.frombuffer(values, dtype=np.float32 if values.typecode == "f" else np.float64)
+        mask = (timestamps >= self.start_us) & (timestamps <= self.end_us)
+        if self._window is not None:
+            mask &= (timestamps >= self._window[0]) & (timestamps < self._window[1])
+        timestamps, values = timestamps[mask], values[mask].astype(np.float64)
+        if len(values):
+            self._pending.append((sensor_id, timestamps, values))
+            self._pending_rows += len(values)
+            if self._pending_rows >= self.chunk_rows:
+                self._flush_columns()
+
+    def add_rollups(self, rows):
+        for sensor_id, bucket_us, count, total, minimum, maximum in rows:
+            key = (sensor_id, bucket_us - bucket_us % self.bucket_us)
+            current = self._groups.get(key)
+            if current is None:
+                self._groups[key] = [count, total, minimum, maximum, []]
+                continue
+            current[0] += count
+            current[1] += total
+            current[2] = min(current[2], minimum)
+            current[3] = max(current[3], maximum)
+
+    def results(self) -> list:
+        self._flush_columns()
+        results = []
+        for (sensor_id, bucket_us) in sorted(self._groups):
+            count, total, minimum, maximum, parts = self._groups[(sensor_id, bucket_us)]
+            row = {'sensor_id': sensor_id, 'bucket': from_epoch_us(bucket_us)}
+            for name in self.stats:
+                if name == "count":
+                    row[name] = count
+                elif name == "sum":
+                    row[name] = total
+                elif name == "min":
+                    row[name] = minimum
+                elif name == "max":
+                    row[name] = maximum
+                elif name == "mean":
+                    row[name] = total / count
+            if self.percentiles:
+                values = np.concatenate(parts)
+                for name, value in zip(self._percentile_names(), np.percentile(values, self.percentiles)):
+                    row[name] = float(value)
+            results.append(row)
+        return results
+
+    def _percentile_names(self):
+        return [name for name in self.stats if name not in BASE_STATS]
+
+    def _flush_columns(self):
+        if not self._pending:
+            return
+        labels = sorted({sensor_id for sensor_id, _, _ in self._pending})
+        positions = {sensor_id: i for i, sensor_id in enumerate(labels)}
+        codes = np.concatenate([np.full(len(values), positions[sensor_id]) for sensor_id, _, values in self._pending])
+        timestamps = np.concatenate([timestamps for _, timestamps, _ in self._pending])
+        values = np.concatenate([values for _, _, values in self._pending])
+        self._pending = []
+        self._pending_rows = 0
+        self._add(np.array(labels), codes, timestamps, values)
+
+    def _add(self, labels, codes, timestamps, values):
+        buckets = timestamps - timestamps % self.bucket_us
+        bucket_values, bucket_codes = np.unique(buckets, return_inverse=True)
+        groups, group_codes = np.unique(codes * len(bucket_values) + bucket_codes, return_inverse=True)
+
+        order = np.argsort(group_codes, kind="stable")
+        sorted_values = values[order]
+        starts = np.flatnonzero(np.r_[True, np.diff(group_codes[order]) != 0])
+        counts = np.bincount(group_codes, minlength=len(groups))
+        sums = np.bincount(group_codes, weights=values, minlength=len(groups))
+        minimums = np.minimum.reduceat(sorted_values, starts)
+        maximums = np.maximum.reduceat(sorted_values, starts)
+        parts = np.split(sorted_values, starts[1:]) if self.percentiles else None
+
+        for i, group in enumerate(groups.tolist()):
+            key = (str(labels[group // len(bucket_values)]), int(bucket_values[group % len(bucket_values)]))
+            current = self._groups.get(key)
+            if current is None:
+                current = self._groups[key] = [0, 0.0, float(minimums[i]), float(maximums[i]), []]
+            current[0] += int(counts[i])
+            current[1] += float(sums[i])
+            current[2] = min(current[2], float(minimums[i]))
+            current[3] = max(current[3], float(maximums[i]))
+            if parts is not None:
+                current[4].append(parts[i])
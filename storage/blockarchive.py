@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import locale
+import struct
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from storage.index import FileStats
+
+BLOCK_MAGIC = b"SLB1"
+BLOCK_HEADER = struct.Struct("!4sBII")
+CODEC_IDS = {"deflate": 1, "zstd": 2, "lz4": 3}
+CODEC_NAMES = {value: key for key, value in CODEC_IDS.items()}
+
+
+def _compress(codec: str, raw: bytes, level: Optional[int]) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=level or 3).compress(raw)
+    if codec == "lz4":
+        import lz4.frame
+        return lz4.frame.compress(raw, compression_level=level or 0)
+    return zlib.compress(raw, 6 if level is None else level)
+
+
+def _decompress(codec: str, payload: bytes) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == "lz4":
+        import lz4.frame
+        return lz4.frame.decompress(payload)
+    return zlib.decompress(payload)
+
+
+def write_block_archive(source_path: str, target_path: str, codec: str = "deflate",
+                        level: Optional[int] = None, block_rows: int = 20000) -> FileStats:
+    if codec not in CODEC_IDS:
+        raise ValueError(f"Nieznany kodek kompresji: {codec}")
+    encoding = locale.getpreferredencoding(False)
+    total = FileStats()
+
+    def _write_block(target, lines):
+        timestamps = []
+        sensors = []
+        for line in lines:
+            text = line.decode(encoding)
+            fields = text.split(",", 2) if '"' not in text else next(csv.reader([text]))
+            timestamps.append(fields[0])
+            sensors.append(fields[1])
+        stats = FileStats(min(timestamps), max(timestamps), dict(Counter(sensors)))
+        payload = _compress(codec, b"".join(lines), level)
+        header = json.dumps(stats.to_dict()).encode("utf-8")
+        target.write(BLOCK_HEADER.pack(BLOCK_MAGIC, CODEC_IDS[codec], len(header), len(payload)))
+        target.write(header)
+        target.write(payload)
+        total.merge(stats)
+
+    with open(source_path, "rb") as source, open(target_path, "wb") as target:
+        lines = []
+        for line in source:
+            if not line.strip() or line.startswith(b"timestamp,"):
+                continue
+            lines.append(line)
+            if len(lines) >= block_rows:
+                _write_block(target, lines)
+                lines = []
+        if lines:
+            _write_block(target, lines)
+    return total
+
+
+def iter_block_headers(f) -> Iterator[tuple]:
+    while True:
+        raw = f.read(BLOCK_HEADER.size)
+        if not raw:
+            return
+        if len(raw) < BLOCK_HEADER.size:
+            raise ValueError("Uszkodzony nagłówek bloku archiwum")
+        magic, codec_id, header_len, payload_len = BLOCK_HEADER.unpack(raw)
+        if magic != BLOCK_MAGIC or codec_id not in CODEC_NAMES:
+            raise ValueError("Nieprawidłowy format bloku archiwum")
+        stats = FileStats.from_dict(json.loads(f.read(header_len)))
+        yield stats, CODEC_NAMES[codec_id], payload_len
+
+
+def block_archive_stats(path: str) -> FileStats:
+    total = FileStats()
+    for _, _, stats in list_blocks(path):
+        total.merge(stats)
+    return total
+
+
+def list_blocks(path: str) -> List[tuple]:
+    blocks = []
+    with open(path, "rb") as f:
+        offset = 0
+        for stats, _, payload_len in iter_block_headers(f):
+            f.seek(payload_len, io.SEEK_CUR)
+            blocks.append((offset, f.tell(), stats))
+            offset = f.tell()
+    return blocks
+
+
+def read_block_archive(path: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       sensor_id: Optional[str] = None, begin: int = 0, stop: Optional[int] = None) -> Iterator[list]:
+    with open(path, "rb") as f:
+        f.seek(begin)
+        for stats, codec, payload_len in iter_block_headers(f):
+            if start is not None and end is not None and not stats.may_match(start, end, sensor_id):
+                f.seek(payload_len, io.SEEK_CUR)
+            else:
+                raw = _decompress(codec, f.read(payload_len))
+                with io.TextIOWrapper(io.BytesIO(raw), encoding=locale.getpreferredencoding(False), newline="") as text:
+                    yield from csv.reader(text)
+            if stop is not None and f.tell() >= stop:
+                return
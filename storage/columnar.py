@@ -0,0 +1,205 @@
+import json
+import mmap
+import os
+import shutil
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional, Iterator, Dict
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+BLOCK_NAME_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def to_epoch_us(timestamp: datetime) -> int:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return (timestamp - EPOCH) // MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+@contextmanager
+def mapped_column(path: str, typecode: str):
+    itemsize = array(typecode).itemsize
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        size -= size % itemsize
+        if size == 0:
+            yield memoryview(array(typecode))
+            return
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as raw, raw.cast(typecode) as view:
+                yield view
+
+
+class ColumnarStore:
+    def __init__(self, root: str, block_hours: float = 1, value_type: str = "d"):
+        self.root = root
+        self.block_us = int(block_hours * 3600 * 1_000_000)
+        self.value_type = value_type
+        self._dictionary_path = os.path.join(root, "dictionary.json")
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._sensors = []
+        self._last_ts = {}
+        self._last_retention = None
+        os.makedirs(root, exist_ok=True)
+        self._load_dictionary()
+
+    def append(self, readings: list):
+        columns = {}
+        for timestamp, sensor_id, value, unit in readings:
+            ts = to_epoch_us(timestamp)
+            chunk = (ts - ts % self.block_us, self._key(sensor_id, unit))
+            column = columns.get(chunk)
+            if column is None:
+                column = columns[chunk] = (array("q"), array(self.value_type))
+            column[0].append(ts)
+            column[1].append(value)
+        for (block, key), (timestamps, values) in columns.items():
+            self._write_chunk(block, key, timestamps, values)
+
+    def iter_columns(self, start: datetime, end: datetime, sensor_id: Optional[str] = None) -> Iterator[tuple]:
+        start_us = to_epoch_us(start)
+        end_us = to_epoch_us(end)
+        with self._lock:
+            sensors = list(enumerate(self._sensors))
+        wanted = [(key, sid, unit) for key, (sid, unit) in sensors if sensor_id is None or sid == sensor_id]
+
+        for block, directory in self._blocks():
+            if block > end_us or block + self.block_us <= start_us:
+                continue
+            for key, sid, unit in wanted:
+                base = os.path.join(directory, str(key))
+                if not os.path.exists(base + ".ts"):
+                    continue
+                timestamps, values = self._read_chunk(base, start_us, end_us)
+                if timestamps:
+                    yield sid, unit, timestamps, values
+
+    def read(self, start: datetime, end: datetime, sensor_id: Optional[str] = None) -> Iterator[Dict]:
+        for sid, unit, timestamps, values in self.iter_columns(start, end, sensor_id):
+            for ts, value in zip(timestamps, values):
+                yield {
+                    'timestamp': from_epoch_us(ts),
+                    'sensor_id': sid,
+                    'value': value,
+                    'unit': unit
+                }
+
+    def apply_retention(self, retention_days: int):
+        now = datetime.now()
+        if self._last_retention and now - self._last_retention < timedelta(microseconds=self.block_us):
+            return
+        self._last_retention = now
+        cutoff = to_epoch_us(now - timedelta(days=retention_days))
+        for block, directory in self._blocks():
+            if block + self.block_us < cutoff:
+                shutil.rmtree(directory, ignore_errors=True)
+                with self._lock:
+                    self._last_ts = {chunk: ts for chunk, ts in self._last_ts.items() if chunk[0] != block}
+
+    def disk_usage(self) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(dirpath, name)) for name in filenames)
+        return total
+
+    def _blocks(self):
+        blocks = []
+        for name in os.listdir(self.root):
+            directory = os.path.join(self.root, name)
+            if not os.path.isdir(directory):
+                continue
+            try:
+                block = to_epoch_us(datetime.strptime(name, BLOCK_NAME_FORMAT))
+            except ValueError:
+                continue
+            blocks.append((block, directory))
+        blocks.sort()
+        return blocks
+
+    def _read_chunk(self, base: str, start_us: int, end_us: int):
+        timestamps = array("q")
+        values = array(self.value_type)
+        unsorted = os.path.exists(base + ".unsorted")
+        with mapped_column(base + ".ts", "q") as ts_view, mapped_column(base + ".val", self.value_type) as val_view:
+            count = min(len(ts_view), len(val_view))
+            if unsorted:
+                for i in range(count):
+                    if start_us <= ts_view[i] <= end_us:
+                        timestamps.append(ts_view[i])
+                        values.append(val_view[i])
+            else:
+                lo = bisect_left(ts_view, start_us, 0, count)
+                hi = bisect_right(ts_view, end_us, lo, count)
+                timestamps.frombytes(ts_view[lo:hi].cast("B"))
+                values.frombytes(val_view[lo:hi].cast("B"))
+        return timestamps, values
+
+    def _write_chunk(self, block: int, key: int, timestamps: array, values: array):
+        directory = os.path.join(self.root, from_epoch_us(block).strftime(BLOCK_NAME_FORMAT))
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, str(key))
+
+        last = self._last_ts.get((block, key))
+        if last is None:
+            last = self._last_written(base)
+        ordered = last is None or timestamps[0] >= last
+        if ordered:
+            ordered = all(a <= b for a, b in zip(timestamps, timestamps[1:]))
+        if not ordered and not os.path.exists(base + ".unsorted"):
+            open(base + ".unsorted", "wb").close()
+        self._last_ts[(block, key)] = max(timestamps) if last is None else max(last, max(timestamps))
+
+        with open(base + ".val", "ab") as f:
+            values.tofile(f)
+        with open(base + ".ts", "ab") as f:
+            timestamps.tofile(f)
+
+    def _last_written(self, base: str) -> Optional[int]:
+        try:
+            with open(base + ".ts", "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                if size < 8:
+                    return None
+                f.seek(size - size % 8 - 8)
+                last = array("q")
+                last.frombytes(f.read(8))
+                return last[0]
+        except FileNotFoundError:
+            return None
+
+    def _key(self, sensor_id: str, unit: str) -> int:
+        key = self._keys.get((sensor_id, unit))
+        if key is None:
+            with self._lock:
+                key = self._keys.get((sensor_id, unit))
+                if key is None:
+                    key = len(self._sensors)
+                    self._sensors.append((sensor_id, unit))
+                    self._keys[(sensor_id, unit)] = key
+                    self._save_dictionary()
+        return key
+
+    def _load_dictionary(self):
+        try:
+            with open(self._dictionary_path, "r") as f:
+                sensors = json.load(f)["sensors"]
+        except (OSError, ValueError, KeyError):
+            return
+        self._sensors = [tuple(entry) for entry in sensors]
+        self._keys = {entry: key for key, entry in enumerate(self._sensors)}
+
+    def _save_dictionary(self):
+        tmp_path = self._dictionary_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"sensors": self._sensors}, f)
+        os.replace(tmp_path, self._dictionary_path)
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+
+class FileStats:
+    __slots__ = ("min_ts", "max_ts", "sensors")
+
+    def __init__(self, min_ts: Optional[str] = None, max_ts: Optional[str] = None, sensors: Optional[dict] = None):
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.sensors = sensors if sensors is not None else {}
+
+    @property
+    def rows(self) -> int:
+        return sum(self.sensors.values())
+
+    def add(self, timestamp: str, sensor_id: str):
+        if self.min_ts is None or timestamp < self.min_ts:
+            self.min_ts = timestamp
+        if self.max_ts is None or timestamp > self.max_ts:
+            self.max_ts = timestamp
+        self.sensors[sensor_id] = self.sensors.get(sensor_id, 0) + 1
+
+    def merge(self, other: "FileStats"):
+        if other.min_ts is not None and (self.min_ts is None or other.min_ts < self.min_ts):
+            self.min_ts = other.min_ts
+        if other.max_ts is not None and (self.max_ts is None or other.max_ts > self.max_ts):
+            self.max_ts = other.max_ts
+        for sensor_id, count in other.sensors.items():
+            self.sensors[sensor_id] = self.sensors.get(sensor_id, 0) + count
+
+    def may_match(self, start: datetime, end: datetime, sensor_id: Optional[str] = None) -> bool:
+        if self.min_ts is None:
+            return False
+        if sensor_id is not None and sensor_id not in self.sensors:
+            return False
+        return datetime.fromisoformat(self.min_ts) <= end and datetime.fromisoformat(self.max_ts) >= start
+
+    def to_dict(self) -> dict:
+        return {"min_ts": self.min_ts, "max_ts": self.max_ts, "sensors": self.sensors}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FileStats":
+        return cls(data.get("min_ts"), data.get("max_ts"), dict(data.get("sensors", {})))
+
+
+class LogIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def lookup(self, key: str, file_path: str) -> Optional[FileStats]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            return None
+        return FileStats.from_dict(entry)
+
+    def store(self, key: str, file_path: str, stats: FileStats, stat: Optional[os.stat_result] = None):
+        stat = stat or os.stat(file_path)
+        entry = stats.to_dict()
+        entry["size"] = stat.st_size
+        entry["mtime_ns"] = stat.st_mtime_ns
+        with self._lock:
+            self._entries[key] = entry
+
+    def discard(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def save(self):
+        with self._lock:
+            content = json.dumps(self._entries, indent=1)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+class ActiveFileIndex:
+    def __init__(self, block_rows: int):
+        self.block_rows = block_rows
+        self._blocks = []
+        self._lock = threading.Lock()
+
+    def add_region(self, start: int, end: int, stats: Optional[FileStats]):
+        with self._lock:
+            self._blocks.append([start, end, stats])
+
+    def add(self, start: int, end: int, rows: list):
+        with self._lock:
+            last = self._blocks[-1] if self._blocks else None
+            if last is None or last[2] is None or last[1] != start or last[2].rows >= self.block_rows:
+                last = [start, end, FileStats()]
+                self._blocks.append(last)
+            stats = last[2]
+            for row in rows:
+                stats.add(row[0], row[1])
+            last[1] = end
+
+    def ranges(self, start: datetime, end: datetime, sensor_id: Optional[str] = None) -> list:
+        with self._lock:
+            blocks = [(block[0], block[1], block[2]) for block in self._blocks]
+        ranges = []
+        for block_start, block_end, stats in blocks:
+            if stats is not None and not stats.may_match(start, end, sensor_id):
+                continue
+            if ranges and ranges[-1][1] == block_start:
+                ranges[-1][1] = block_end
+            else:
+                ranges.append([block_start, block_end])
+        return ranges
+
+    def file_stats(self) -> Optional[FileStats]:
+        total = FileStats()
+        with self._lock:
+            for _, _, stats in self._blocks:
+                if stats is None:
+                    return None
+                total.merge(stats)
+        return total
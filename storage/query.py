@@ -0,0 +1,125 @@
+import csv
+import io
+import locale
+import os
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from storage.blockarchive import block_archive_stats, read_block_archive
+from storage.index import FileStats
+
+SCAN_CHUNK_BYTES = 1024 * 1024
+
+
+def read_csv_file(path: str) -> Iterator[list]:
+    with open(path, 'r', newline='') as f:
+        yield from csv.reader(f)
+
+
+def read_csv_range(path: str, begin: int, stop: int) -> Iterator[list]:
+    with open(path, 'rb') as f:
+        if begin:
+            f.seek(begin - 1)
+            f.readline()
+        position = f.tell()
+        data = f.read(max(stop - position, 0))
+        if data and not data.endswith(b'\n'):
+            data += f.readline()
+    with io.TextIOWrapper(io.BytesIO(data), encoding=locale.getpreferredencoding(False), newline='') as text:
+        yield from csv.reader(text)
+
+
+def csv_ranges(path: str, chunk_bytes: int = SCAN_CHUNK_BYTES) -> List[tuple]:
+    size = os.path.getsize(path)
+    return [(begin, min(begin + chunk_bytes, size)) for begin in range(0, size, chunk_bytes)]
+
+
+def read_zip_file(path: str) -> Iterator[list]:
+    import zipfile
+    with zipfile.ZipFile(path) as archive:
+        for member in archive.namelist():
+            with archive.open(member) as file, io.TextIOWrapper(file, encoding='utf-8', newline='') as text:
+                yield from csv.reader(text)
+
+
+def file_reader(path: str):
+    if path.endswith('.zip'):
+        return read_zip_file
+    return read_csv_file
+
+
+def filter_rows(rows, start: datetime, end: datetime, sensor_id: Optional[str], make_record, fast: bool = True,
+                counts: Optional[list] = None):
+    scanned = returned = 0
+    try:
+        if not fast or start.tzinfo is not None or end.tzinfo is not None:
+            for scanned, row in enumerate(rows, 1):
+                if not row or row[0] == 'timestamp':
+                    continue
+                row_time = datetime.fromisoformat(row[0])
+                if start <= row_time <= end:
+                    if sensor_id is None or row[1] == sensor_id:
+                        returned += 1
+                        yield make_record(row_time, row[1], float(row[2]), row[3])
+            return
+
+        start_iso = start.isoformat()
+        end_iso = end.isoformat()
+        parse = datetime.fromisoformat
+        for scanned, row in enumerate(rows, 1):
+            if not row:
+                continue
+            if sensor_id is not None and row[1] != sensor_id:
+                continue
+            raw_time = row[0]
+            if (len(raw_time) == 19 or len(raw_time) == 26) and raw_time[10] == 'T':
+                if raw_time < start_iso or raw_time > end_iso:
+                    continue
+                row_time = parse(raw_time)
+            else:
+                if raw_time == 'timestamp':
+                    continue
+                row_time = parse(raw_time)
+                if not start <= row_time <= end:
+                    continue
+            returned += 1
+            yield make_record(row_time, row[1], float(row[2]), row[3])
+    finally:
+        if counts is not None:
+            counts[0] += scanned
+            counts[1] += returned
+
+
+def scan_file(path: str, start: datetime, end: datetime, sensor_id: Optional[str],
+              collect_stats: bool, ordered: bool, fast: bool = True, part: Optional[tuple] = None):
+    stats = None
+    if path.endswith('.blk'):
+        if collect_stats:
+            stats = block_archive_stats(path)
+        rows = read_block_archive(path, start, end, sensor_id, *(part or ()))
+    else:
+        rows = read_csv_range(path, *part) if part is not None else file_reader(path)(path)
+        if collect_stats:
+            stats = FileStats()
+            rows = _collect_stats(rows, stats)
+
+    counts = [0, 0]
+    result = list(filter_rows(rows, start, end, sensor_id, tuple_record, fast, counts))
+    if ordered:
+        result.sort(key=_row_timestamp)
+    return result, stats.to_dict() if stats is not None else None, counts[0]
+
+
+def tuple_record(timestamp, sensor_id, value, unit):
+    return timestamp, sensor_id, value, unit
+
+
+def _row_timestamp(row):
+    return row[0]
+
+
+def _collect_stats(rows, stats: FileStats):
+    for row in rows:
+        if row and row[0] != 'timestamp':
+            stats.add(row[0], row[1])
+        yield row
@@ -0,0 +1,115 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+
+class _Window:
+    __slots__ = ("length", "start", "total", "minimums", "maximums")
+
+    def __init__(self, length: timedelta, start: int):
+        self.length = length
+        self.start = start
+        self.total = 0.0
+        self.minimums = deque()
+        self.maximums = deque()
+
+
+class RollingStats:
+    def __init__(self, windows: Iterable[timedelta]):
+        self._windows = {}
+        for window in windows:
+            if not isinstance(window, timedelta):
+                window = timedelta(seconds=window)
+            if window <= timedelta(0):
+                raise ValueError(f"Nieprawidłowa długość okna: {window}")
+            self._windows[window] = _Window(window, 0)
+        if not self._windows:
+            raise ValueError("Wymagane jest co najmniej jedno okno")
+        self._timestamps = []
+        self._values = []
+        self._base = 0
+        self._last = None
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._timestamps) - (self._oldest_start() - self._base)
+
+    @property
+    def next_index(self) -> int:
+        return self._base + len(self._timestamps)
+
+    def add(self, timestamp: datetime, value: float) -> bool:
+        if self._last is not None and timestamp < self._last:
+            self.rejected += 1
+            return False
+        self._last = timestamp
+        index = self.next_index
+        self._timestamps.append(timestamp)
+        self._values.append(value)
+
+        for window in self._windows.values():
+            window.total += value
+            while window.minimums and window.minimums[-1][1] >= value:
+                window.minimums.pop()
+            window.minimums.append((index, value))
+            while window.maximums and window.maximums[-1][1] <= value:
+                window.maximums.pop()
+            window.maximums.append((index, value))
+        self.expire(timestamp)
+        return True
+
+    def expire(self, now: datetime) -> bool:
+        end = self.next_index
+        expired = False
+        for window in self._windows.values():
+            cutoff = now - window.length
+            while window.start < end and self._timestamps[window.start - self._base] < cutoff:
+                window.total -= self._values[window.start - self._base]
+                window.start += 1
+                expired = True
+            while window.minimums and window.minimums[0][0] < window.start:
+                window.minimums.popleft()
+            while window.maximums and window.maximums[0][0] < window.start:
+                window.maximums.popleft()
+            if window.start == end:
+                window.total = 0.0
+        self._compact()
+        return expired
+
+    def count(self, window: timedelta) -> int:
+        return self.next_index - self._window(window).start
+
+    def sum(self, window: timedelta) -> float:
+        return self._window(window).total
+
+    def mean(self, window: timedelta) -> Optional[float]:
+        count = self.count(window)
+        if not count:
+            return None
+        return self._window(window).total / count
+
+    def min(self, window: timedelta) -> Optional[float]:
+        minimums = self._window(window).minimums
+        return minimums[0][1] if minimums else None
+
+    def max(self, window: timedelta) -> Optional[float]:
+        maximums = self._window(window).maximums
+        return maximums[0][1] if maximums else None
+
+    def _window(self, window) -> _Window:
+        if not isinstance(window, timedelta):
+            window = timedelta(seconds=window)
+        try:
+            return self._windows[window]
+        except KeyError:
+            raise KeyError(f"Nieskonfigurowane okno: {window}") from None
+
+    def _oldest_start(self) -> int:
+        return min(window.start for window in self._windows.values())
+
+    def _compact(self):
+        expired = self._oldest_start() - self._base
+        if expired and expired * 2 >= len(self._timestamps):
+            del self._timestamps[:expired]
+            del self._values[:expired]
+            self._base += expired
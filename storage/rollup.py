@@ -0,0 +1,312 @@
+import csv
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional
+
+from storage.columnar import BLOCK_NAME_FORMAT, from_epoch_us, to_epoch_us
+
+BUCKET_UNITS = {"s": 1, "min": 60, "m": 60, "h": 3600, "d": 86400}
+DAY_US = 86400 * 1_000_000
+PARTITION_BUCKETS = 1440
+HEADER = ["bucket", "sensor_id", "unit", "count", "sum", "min", "max"]
+FILE_REGEX = re.compile(r"(\d{8}T\d{6})(?:_w\d+)?\.csv")
+CLOSED_REGEX = re.compile(r"closed(?:_w\d+)?")
+
+
+def parse_bucket(bucket) -> int:
+    if isinstance(bucket, timedelta):
+        return bucket // timedelta(microseconds=1)
+    if isinstance(bucket, (int, float)):
+        return int(bucket * 1_000_000)
+    match = re.fullmatch(r"(\d+)\s*(s|min|m|h|d)", str(bucket).strip())
+    if not match:
+        raise ValueError(f"Nieprawidłowy przedział agregacji: {bucket}")
+    return int(match.group(1)) * BUCKET_UNITS[match.group(2)] * 1_000_000
+
+
+class RollupTier:
+    __slots__ = ("name", "bucket_us", "retention_days", "partition_us")
+
+    def __init__(self, name: str, bucket, retention_days: Optional[float] = None):
+        self.name = name
+        self.bucket_us = parse_bucket(bucket)
+        if self.bucket_us <= 0:
+            raise ValueError(f"Nieprawidłowy przedział agregacji: {bucket}")
+        self.retention_days = retention_days
+        self.partition_us = self.bucket_us * PARTITION_BUCKETS
+
+    def floor(self, ts_us: int) -> int:
+        return ts_us - ts_us % self.bucket_us
+
+    def ceil(self, ts_us: int) -> int:
+        return -(-ts_us // self.bucket_us) * self.bucket_us
+
+
+def parse_tiers(entries: Iterable[dict]) -> List[RollupTier]:
+    tiers = []
+    for entry in entries:
+        if not isinstance(entry, dict) or "bucket" not in entry:
+            raise ValueError(f"Nieprawidłowa definicja poziomu agregatów: {entry!r}")
+        tiers.append(RollupTier(str(entry.get("name") or entry["bucket"]), entry["bucket"], entry.get("retention_days")))
+    names = [tier.name for tier in tiers]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Powtórzona nazwa poziomu agregatów: {', '.join(names)}")
+    return sorted(tiers, key=lambda tier: tier.bucket_us)
+
+
+class RollupStore:
+    def __init__(self, root: str, tiers: List[RollupTier], suffix: str = ""):
+        self.root = root
+        self.tiers = sorted(tiers, key=lambda tier: tier.bucket_us)
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._open = {tier.name: {} for tier in self.tiers}
+        self._closed = {tier.name: None for tier in self.tiers}
+        self._late = set()
+        self._since = {}
+        self._watermark = None
+        self._last_retention = None
+        for tier in self.tiers:
+            os.makedirs(os.path.join(root, tier.name), exist_ok=True)
+
+    def add(self, readings: list):
+        if not readings:
+            return
+        with self._lock:
+            first = self._fold(readings)
+            for tier in self.tiers:
+                self._close(tier, self._watermark - tier.bucket_us)
+        for tier in self.tiers:
+            if self._since.get(tier.name) is None:
+                self._mark_since(tier, first)
+
+    def flush(self):
+        with self._lock:
+            for tier in self.tiers:
+                self._close(tier, None)
+
+    def rebuild(self, readings: Iterable[tuple], chunk_rows: int = 100000):
+        first = None
+        with self._lock:
+            for tier in self.tiers:
+                self._open[tier.name].clear()
+                self._closed[tier.name] = None
+                self._late.discard(tier.name)
+                for _, path in self._files(tier):
+                    os.remove(path)
+                self._since.pop(tier.name, None)
+            self._watermark = None
+            self._last_retention = None
+
+            chunk = []
+            for reading in readings:
+                chunk.append(reading)
+                if len(chunk) >= chunk_rows:
+                    first = self._rebuild_chunk(chunk, first)
+                    chunk = []
+            first = self._rebuild_chunk(chunk, first)
+            for tier in self.tiers:
+                self._close(tier, None)
+        if first is not None:
+            for tier in self.tiers:
+                self._mark_since(tier, first, replace=True)
+
+    def plan(self, start: datetime, end: datetime, bucket_us: int, raw_retention_days: Optional[float] = None,
+             now: Optional[datetime] = None) -> Optional[tuple]:
+        now_us = to_epoch_us(now or datetime.now())
+        start_us = to_epoch_us(start)
+        end_us = to_epoch_us(end) + 1
+        raw_from = start_us
+        if raw_retention_days is not None:
+            raw_from = max(start_us, now_us - int(raw_retention_days * DAY_US))
+
+        for tier in reversed(self.tiers):
+            if bucket_us % tier.bucket_us:
+                continue
+            since = self._read_since(tier)
+            closed = self._closed_through(tier)
+            if since is None or closed is None:
+                continue
+            covered_from = tier.ceil(since)
+            if tier.retention_days is not None:
+                covered_from = max(covered_from, now_us - int(tier.retention_days * DAY_US))
+            if covered_from > raw_from:
+                continue
+            first = tier.floor(start_us) if start_us < raw_from else tier.ceil(start_us)
+            last = min(tier.floor(end_us), closed)
+            if first < last:
+                return tier, first, last
+        return None
+
+    def read(self, tier: RollupTier, start_us: int, end_us: int, sensor_ids=None) -> Iterator[tuple]:
+        with self._lock:
+            files = []
+            for partition, path in self._files(tier):
+                if partition < end_us and partition + tier.partition_us > start_us:
+                    try:
+                        files.append((path, os.path.getsize(path)))
+                    except FileNotFoundError:
+                        continue
+
+        low = from_epoch_us(start_us).isoformat()
+        high = from_epoch_us(end_us).isoformat()
+        for path, size in files:
+            for row in self._read_rows(path, size):
+                if row[0] < low or row[0] >= high or (sensor_ids is not None and row[1] not in sensor_ids):
+                    continue
+                bucket = to_epoch_us(datetime.fromisoformat(row[0]))
+                if start_us <= bucket < end_us:
+                    yield row[1], bucket, int(row[3]), float(row[4]), float(row[5]), float(row[6])
+
+    def apply_retention(self, now: Optional[datetime] = None):
+        now = now or datetime.now()
+        with self._lock:
+            if self._last_retention and now - self._last_retention < timedelta(hours=1):
+                return
+            self._last_retention = now
+            for tier in self.tiers:
+                if tier.retention_days is None:
+                    continue
+                cutoff = to_epoch_us(now - timedelta(days=tier.retention_days))
+                for partition, path in self._files(tier):
+                    if partition + tier.partition_us <= cutoff:
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            continue
+
+    def _fold(self, readings) -> int:
+        first = None
+        watermark = self._watermark
+        groups_by_tier = [(tier.name, tier.bucket_us, self._open[tier.name], self._closed[tier.name]) for tier in self.tiers]
+        for timestamp, sensor_id, value, unit in readings:
+            ts = to_epoch_us(timestamp)
+            if watermark is None or ts > watermark:
+                watermark = ts
+            if first is None or ts < first:
+                first = ts
+            for name, bucket_us, groups, closed in groups_by_tier:
+                key = (sensor_id, ts - ts % bucket_us)
+                group = groups.get(key)
+                if group is None:
+                    groups[key] = [unit, 1, value, value, value]
+                    if closed is not None and key[1] + bucket_us <= closed:
+                        self._late.add(name)
+                    continue
+                group[1] += 1
+                group[2] += value
+                if value < group[3]:
+                    group[3] = value
+                elif value > group[4]:
+                    group[4] = value
+        self._watermark = watermark
+        return first
+
+    def _rebuild_chunk(self, chunk, first):
+        if not chunk:
+            return first
+        chunk_first = self._fold(chunk)
+        for tier in self.tiers:
+            self._close(tier, self._watermark - tier.bucket_us)
+        return chunk_first if first is None else min(first, chunk_first)
+
+    def _close(self, tier: RollupTier, before_us: Optional[int]):
+        groups = self._open[tier.name]
+        advanced = False
+        if before_us is not None:
+            before_us = tier.floor(before_us)
+            if before_us == self._closed[tier.name] and tier.name not in self._late:
+                return
+            advanced = before_us != self._closed[tier.name]
+            self._closed[tier.name] = before_us
+            self._late.discard(tier.name)
+        closed = [key for key in groups if before_us is None or key[1] + tier.bucket_us <= before_us]
+        self._write(tier, groups, closed)
+        if advanced:
+            self._mark_closed(tier, before_us)
+
+    def _write(self, tier: RollupTier, groups: dict, closed: list):
+        partitions = {}
+        for key in closed:
+            sensor_id, bucket = key
+            unit, count, total, minimum, maximum = groups.pop(key)
+            partitions.setdefault(bucket - bucket % tier.partition_us, []).append(
+                (bucket, sensor_id, unit, count, total, minimum, maximum)
+            )
+        for partition, rows in partitions.items():
+            rows.sort()
+            path = self._path(tier, partition)
+            exists = os.path.isfile(path)
+            with open(path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if not exists:
+                    writer.writerow(HEADER)
+                writer.writerows([from_epoch_us(row[0]).isoformat(), *row[1:]] for row in rows)
+
+    def _path(self, tier: RollupTier, partition: int) -> str:
+        name = from_epoch_us(partition).strftime(BLOCK_NAME_FORMAT)
+        return os.path.join(self.root, tier.name, f"{name}{self.suffix}.csv")
+
+    def _files(self, tier: RollupTier) -> list:
+        files = []
+        directory = os.path.join(self.root, tier.name)
+        for name in os.listdir(directory):
+            match = FILE_REGEX.fullmatch(name)
+            if match:
+                partition = to_epoch_us(datetime.strptime(match.group(1), BLOCK_NAME_FORMAT))
+                files.append((partition, os.path.join(directory, name)))
+        files.sort()
+        return files
+
+    def _read_rows(self, path: str, size: int) -> Iterator[list]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read(size)
+        except FileNotFoundError:
+            return
+        data = data[:data.rfind(b"\n") + 1]
+        for row in csv.reader(data.decode("utf-8").splitlines()):
+            if row and row[0] != "bucket":
+                yield row
+
+    def _mark_closed(self, tier: RollupTier, closed_us: int):
+        path = os.path.join(self.root, tier.name, f"closed{self.suffix}")
+        with open(path + ".tmp", "w") as f:
+            f.write(from_epoch_us(closed_us).isoformat())
+        os.replace(path + ".tmp", path)
+
+    def _closed_through(self, tier: RollupTier) -> Optional[int]:
+        directory = os.path.join(self.root, tier.name)
+        closed = None
+        for name in os.listdir(directory):
+            if not CLOSED_REGEX.fullmatch(name):
+                continue
+            try:
+                with open(os.path.join(directory, name), "r") as f:
+                    value = to_epoch_us(datetime.fromisoformat(f.read().strip()))
+            except (FileNotFoundError, ValueError):
+                continue
+            closed = value if closed is None else min(closed, value)
+        return closed
+
+    def _read_since(self, tier: RollupTier) -> Optional[int]:
+        since = self._since.get(tier.name)
+        if since is None:
+            try:
+                with open(os.path.join(self.root, tier.name, "since"), "r") as f:
+                    since = self._since[tier.name] = to_epoch_us(datetime.fromisoformat(f.read().strip()))
+            except (FileNotFoundError, ValueError):
+                return None
+        return since
+
+    def _mark_since(self, tier: RollupTier, first_us: int, replace: bool = False):
+        path = os.path.join(self.root, tier.name, "since")
+        try:
+            with open(path, "w" if replace else "x") as f:
+                f.write(from_epoch_us(first_us).isoformat())
+        except FileExistsError:
+            pass
+        self._since.pop(tier.name, None)
+        self._read_since(tier)